@@ -1,6 +1,6 @@
 """Beatmatchr backend package."""
 
 from .config import settings
-from .db import db_session, init_db
+from .db import async_db_session, db_session, init_async_db, init_db
 
-__all__ = ["settings", "db_session", "init_db"]
+__all__ = ["settings", "db_session", "init_db", "async_db_session", "init_async_db"]
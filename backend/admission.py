@@ -0,0 +1,207 @@
+"""Admission control for endpoints that enqueue background work.
+
+Before a request enqueues tasks, :func:`admit` checks, in order:
+
+1. the depth of the Celery queue the work is routed to (503 when backed up),
+2. the number of the project's tasks still queued or running (429),
+3. a per-project token bucket (429),
+4. a global token bucket shared by every API process (503).
+
+Rejections raise :class:`Rejected`, which the app turns into a response with
+a ``Retry-After`` header. Admission returns a :class:`Ticket` holding one task
+id per unit of cost; the publishing side sends each task with
+:meth:`Ticket.task_options`, and the task counts as in flight for its project
+until a worker finishes or revokes it (see :mod:`backend.workers.backpressure`).
+Callers that fail before publishing hand the ticket back with
+:func:`release_async`. In-flight tasks are kept per task id with their own
+deadline, so a lost release (a killed worker) heals after
+``INFLIGHT_TTL_SECONDS`` however busy the project is.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from .config import settings
+from .redis_client import get_async_redis, get_redis
+from .workers import profiles
+
+logger = logging.getLogger(__name__)
+
+PROJECT_HEADER = "admission_project"
+INFLIGHT_TTL_SECONDS = 6 * 60 * 60
+INFLIGHT_RETRY_AFTER_SECONDS = 30
+
+# Refill a bucket by the time elapsed since it was last used, then try to take
+# ``cost`` tokens. Returns {allowed, seconds until enough tokens}.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+# Drop expired in-flight tasks, then add ARGV[3..] with deadline now + ARGV[2]
+# unless that would exceed ARGV[1] tasks. Returns 1 when added.
+_RESERVE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1])
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now)
+if redis.call("ZCARD", KEYS[1]) + #ARGV - 2 > limit then
+    return 0
+end
+for index = 3, #ARGV do
+    redis.call("ZADD", KEYS[1], now + ttl, ARGV[index])
+end
+redis.call("EXPIRE", KEYS[1], ttl)
+return 1
+"""
+
+
+@dataclass
+class Ticket:
+    """Admitted work: one task id per unit of admitted cost."""
+
+    project_id: str
+    task_ids: List[str]
+
+    def task_options(self, index: int = 0) -> Dict[str, Any]:
+        """``apply_async`` options publishing the ``index``-th admitted task."""
+
+        return {"task_id": self.task_ids[index], "headers": {PROJECT_HEADER: self.project_id}}
+
+
+class Rejected(Exception):
+    """Work was not admitted; retry after ``retry_after`` seconds."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(int(math.ceil(retry_after)), 1)
+
+
+def _inflight_key(project_id: str) -> str:
+    return f"admission:inflight:{project_id}"
+
+
+@lru_cache()
+def _broker_redis() -> aioredis.Redis:
+    return aioredis.Redis.from_url(settings.celery_broker_url)
+
+
+def _queue_keys(queue: str) -> List[str]:
+    """Broker list keys holding ``queue``'s messages, one per priority step."""
+
+    transport = profiles.BROKER_TRANSPORT_OPTIONS
+    return [queue if step == 0 else f"{queue}{transport['sep']}{step}" for step in transport["priority_steps"]]
+
+
+async def queue_depth(queue: str) -> int:
+    """Number of messages waiting in a Celery queue (Redis brokers only)."""
+
+    if not settings.celery_broker_url.startswith(("redis://", "rediss://")):
+        return 0
+    client = _broker_redis()
+    async with client.pipeline(transaction=False) as pipe:
+        for key in _queue_keys(queue):
+            pipe.llen(key)
+        lengths = await pipe.execute()
+    return sum(lengths)
+
+
+async def _take_tokens(name: str, rate: float, burst: int, cost: int) -> Tuple[bool, float]:
+    allowed, wait = await get_async_redis().eval(
+        _TOKEN_BUCKET_SCRIPT, 1, f"admission:bucket:{name}", rate, burst, min(cost, burst)
+    )
+    return bool(allowed), float(wait)
+
+
+async def _reserve_inflight(ticket: Ticket) -> bool:
+    reserved = await get_async_redis().eval(
+        _RESERVE_SCRIPT,
+        1,
+        _inflight_key(ticket.project_id),
+        settings.admission_max_inflight_per_project,
+        INFLIGHT_TTL_SECONDS,
+        *ticket.task_ids,
+    )
+    return bool(reserved)
+
+
+async def admit(project_id: str, task_name: str, cost: int = 1) -> Ticket:
+    """Admit ``cost`` tasks of ``task_name`` for ``project_id`` or raise :class:`Rejected`.
+
+    Fails open when Redis is unreachable: admission control must not take the
+    API down with it.
+    """
+
+    ticket = Ticket(project_id, [str(uuid.uuid4()) for _ in range(cost)])
+
+    queue = profiles.TASK_QUEUES.get(task_name, "default")
+    buckets = (
+        (f"project:{project_id}", settings.admission_project_rate, settings.admission_project_burst, 429,
+         "Too many requests for this project"),
+        ("global", settings.admission_global_rate, settings.admission_global_burst, 503,
+         "The service is busy; try again later"),
+    )
+    try:
+        depth = await queue_depth(queue)
+        if depth >= settings.admission_max_queue_depth:
+            backlog = depth - settings.admission_max_queue_depth + cost
+            raise Rejected(503, f"The {queue} queue is backed up", backlog / settings.admission_global_rate)
+
+        if not await _reserve_inflight(ticket):
+            raise Rejected(429, "Too much work is already queued for this project", INFLIGHT_RETRY_AFTER_SECONDS)
+
+        for name, rate, burst, status_code, detail in buckets:
+            allowed, wait = await _take_tokens(name, rate, burst, cost)
+            if not allowed:
+                await release_async(ticket)
+                raise Rejected(status_code, detail, wait)
+    except redis.RedisError as exc:
+        logger.warning("Admission control unavailable, admitting request: %s", exc)
+    return ticket
+
+
+async def release_async(ticket: Ticket, published: int = 0) -> None:
+    """Give back the slots of a ticket's tasks after the first ``published``, which were never sent."""
+
+    unpublished = ticket.task_ids[published:]
+    if not unpublished:
+        return
+    try:
+        await get_async_redis().zrem(_inflight_key(ticket.project_id), *unpublished)
+    except redis.RedisError as exc:
+        logger.warning("Failed to release admission ticket for project %s: %s", ticket.project_id, exc)
+
+
+def release(project_id: str, task_id: str) -> None:
+    """Mark one of a project's admitted tasks as finished (worker side)."""
+
+    get_redis().zrem(_inflight_key(project_id), task_id)
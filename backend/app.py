@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import logging
+import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 
-from .db import init_db
-from .routers import audio, lyrics, media
+from . import admission, instrumentation
+from .cache import cache
+from .db import init_async_db
+from .events import broker
+from .routers import audio, events, files, lyrics, media, render, uploads
 
 logger = logging.getLogger(__name__)
 
@@ -13,19 +18,54 @@ logger = logging.getLogger(__name__)
 def create_app() -> FastAPI:
     app = FastAPI(title="Beatmatchr API", version="0.1.0")
 
+    @app.middleware("http")
+    async def _observe_request(request: Request, call_next):  # type: ignore[no-untyped-def]
+        started = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        instrumentation.HTTP_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(response.status_code)
+        ).observe(time.perf_counter() - started)
+        return response
+
+    @app.exception_handler(admission.Rejected)
+    async def _rejected(request: Request, exc: admission.Rejected) -> JSONResponse:
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
     @app.on_event("startup")
-    def _startup() -> None:  # pragma: no cover - FastAPI lifecycle
-        init_db()
+    async def _startup() -> None:  # pragma: no cover - FastAPI lifecycle
+        await init_async_db()
         logger.info("Database initialized")
 
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:  # pragma: no cover - FastAPI lifecycle
+        await broker.stop()
+
     app.include_router(media.router, prefix="/api")
     app.include_router(audio.router, prefix="/api")
+    app.include_router(uploads.router, prefix="/api")
     app.include_router(lyrics.router, prefix="/api")
+    app.include_router(render.router, prefix="/api")
+    app.include_router(events.router, prefix="/api")
+    app.include_router(files.router, prefix="/api")
 
     @app.get("/health")
     async def healthcheck() -> dict:
         return {"status": "ok"}
 
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> Response:
+        payload, content_type = instrumentation.render_metrics()
+        return Response(content=payload, media_type=content_type)
+
+    @app.get("/cache/stats")
+    async def cache_stats() -> dict:
+        return cache.stats()
+
     return app
 
 
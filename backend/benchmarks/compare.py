@@ -0,0 +1,62 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m backend.benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Results are matched by stage and parameters and compared on their median
+time. Exits with status 1 when any matched result got slower by more than
+``--threshold`` (a fraction).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+
+def _index(report: Dict[str, Any]) -> Dict[Tuple[str, str], float]:
+    indexed: Dict[Tuple[str, str], float] = {}
+    for result in report.get("results", []):
+        if "seconds" not in result:
+            continue
+        key = (result["stage"], json.dumps(result.get("params", {}), sort_keys=True))
+        indexed[key] = result["seconds"]["median"]
+    return indexed
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Return one row per result present in both reports."""
+
+    before, after = _index(baseline), _index(candidate)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        change = (after[key] - before[key]) / before[key] if before[key] else 0.0
+        rows.append(
+            {
+                "stage": key[0],
+                "params": json.loads(key[1]),
+                "baseline_median": before[key],
+                "candidate_median": after[key],
+                "change": round(change, 4),
+                "regression": change > threshold,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        rows = compare(json.load(baseline_file), json.load(candidate_file), args.threshold)
+    print(json.dumps(rows, indent=2))
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
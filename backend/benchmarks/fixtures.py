@@ -0,0 +1,63 @@
+"""Synthetic media fixtures generated with ffmpeg's lavfi sources.
+
+Every fixture is deterministic for its parameters and cached by file name in
+the fixture directory, so repeated benchmark runs measure the same inputs.
+"""
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+
+def _ffmpeg(args: List[str]) -> None:
+    result = subprocess.run(["ffmpeg", "-y", "-v", "error", *args], capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg fixture generation failed: {result.stderr}")
+
+
+def click_track(directory: Path, bpm: float, duration: float, sample_rate: int = 22050) -> Path:
+    """A mono WAV with a 10 ms 1 kHz click on every beat at ``bpm``."""
+
+    path = directory / f"click_{bpm:g}bpm_{duration:g}s.wav"
+    if not path.exists():
+        period = 60.0 / bpm
+        expression = f"if(lt(mod(t\\,{period:.6f})\\,0.01)\\,sin(2*PI*1000*t)\\,0)"
+        _ffmpeg(["-f", "lavfi", "-i", f"aevalsrc={expression}:s={sample_rate}:d={duration}", str(path)])
+    return path
+
+
+def color_bars(directory: Path, duration: float, width: int, height: int, fps: int = 30) -> Path:
+    """An H.264/yuv420p MP4 of SMPTE bars with a keyframe every second."""
+
+    path = directory / f"bars_{width}x{height}_{fps}fps_{duration:g}s.mp4"
+    if not path.exists():
+        _ffmpeg(
+            [
+                "-f",
+                "lavfi",
+                "-i",
+                f"smptebars=size={width}x{height}:rate={fps}:duration={duration}",
+                "-c:v",
+                "libx264",
+                "-pix_fmt",
+                "yuv420p",
+                "-g",
+                str(fps),
+                str(path),
+            ]
+        )
+    return path
+
+
+def synthetic_words(count: int, words_per_line: int = 8) -> List[Dict[str, object]]:
+    """Word timestamps with a line-breaking pause after every ``words_per_line`` words."""
+
+    words: List[Dict[str, object]] = []
+    position = 0.0
+    for index in range(count):
+        start = position
+        end = start + 0.3
+        words.append({"start": round(start, 3), "end": round(end, 3), "word": f"word{index}"})
+        position = end + (1.0 if (index + 1) % words_per_line == 0 else 0.05)
+    return words
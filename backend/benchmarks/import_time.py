@@ -0,0 +1,73 @@
+"""Cold-start guard for the API process.
+
+Imports ``backend.app`` in a fresh interpreter with ``-X importtime`` and
+fails (exit status 1) when the import takes longer than ``--budget`` seconds
+or when any heavy media library was pulled in. The worker-only libraries
+must stay lazily imported so every uvicorn worker starts quickly::
+
+    python -m backend.benchmarks.import_time --budget 1.5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+HEAVY_MODULES = ("librosa", "numba", "moviepy", "PIL", "scipy", "proglog")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\| (\s*)(\S+)")
+
+
+def measure(module: str = "backend.app") -> Dict[str, object]:
+    """Import ``module`` in a subprocess and report its cost."""
+
+    probe = (
+        f"import sys, json, {module}\n"
+        f"print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}} & set({list(HEAVY_MODULES)!r}))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative_us = 0
+    slowest: List[Dict[str, object]] = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if not indent:
+            cumulative_us += int(cumulative)
+            slowest.append({"module": name, "seconds": int(cumulative) / 1_000_000})
+
+    slowest.sort(key=lambda entry: entry["seconds"], reverse=True)
+    return {
+        "module": module,
+        "import_seconds": round(cumulative_us / 1_000_000, 3),
+        "heavy_modules_loaded": json.loads(result.stdout.strip().splitlines()[-1]),
+        "slowest_top_level_imports": slowest[:10],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Guard API cold-start import time.")
+    parser.add_argument("--module", default="backend.app")
+    parser.add_argument("--budget", type=float, default=1.5, help="Maximum import time in seconds.")
+    args = parser.parse_args()
+
+    report = measure(args.module)
+    report["budget_seconds"] = args.budget
+    report["ok"] = report["import_seconds"] <= args.budget and not report["heavy_modules_loaded"]
+    print(json.dumps(report, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Concurrent request load test for the read endpoints.
+
+Fires ``--requests`` GET requests at the given paths with ``--concurrency``
+requests in flight and prints throughput and latency percentiles as JSON.
+Run it against a live API (``uvicorn backend.app:app``)::
+
+    python -m backend.benchmarks.load_test --base-url http://localhost:8000/api \\
+        --path /projects/PROJECT_ID/lyrics --path /projects/PROJECT_ID/source-clips
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def run_load_test(base_url: str, paths: List[str], total_requests: int, concurrency: int) -> Dict[str, object]:
+    """Issue ``total_requests`` GETs round-robin over ``paths`` and summarize them."""
+
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+    counter = iter(range(total_requests))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def worker() -> None:
+            for index in counter:
+                path = paths[index % len(paths)]
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    key = str(response.status_code)
+                except httpx.HTTPError as exc:
+                    key = type(exc).__name__
+                latencies.append(time.perf_counter() - started)
+                status_counts[key] = status_counts.get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(total_requests / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+            "p50": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 2),
+        },
+        "status_counts": status_counts,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--path", dest="paths", action="append", required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load_test(args.base_url, args.paths, args.requests, args.concurrency))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Benchmark harness for every pipeline stage.
+
+Generates synthetic fixtures (see :mod:`.fixtures`), times each stage and
+writes the results as JSON for regression comparison with :mod:`.compare`::
+
+    python -m backend.benchmarks.run --output bench.json [--stage analyze_audio ...]
+
+The harness re-executes itself with ``DATABASE_URL``, ``SYNC_DATABASE_URL``
+and the storage path pointing into a scratch directory, so benchmarks never
+touch development data. The HTTP stage additionally needs the Redis instance
+the API uses for caching; it is reported as skipped when Redis is down.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import fixtures
+
+_CHILD_ENV = "BEATMATCHR_BENCH_WORKDIR"
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    value: Any = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "runs": repeat,
+        "seconds": {
+            "min": round(min(samples), 6),
+            "median": round(statistics.median(samples), 6),
+            "mean": round(statistics.fmean(samples), 6),
+        },
+        "last_value": value,
+    }
+
+
+def _result(stage: str, params: Dict[str, Any], timing: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+    timing.pop("last_value", None)
+    return {"stage": stage, "params": params, **timing, **extra}
+
+
+def bench_analyze_audio(workdir: Path, repeat: int) -> List[Dict[str, Any]]:
+    from ..services.audio_analysis import analyze_audio
+
+    results = []
+    for bpm in (90, 120, 174):
+        path = fixtures.click_track(workdir, bpm=bpm, duration=30)
+        timing = _timed(lambda: analyze_audio(str(path)), repeat)
+        detected = timing["last_value"]["bpm"]
+        results.append(_result("analyze_audio", {"bpm": bpm, "duration": 30}, timing, detected_bpm=detected))
+    return results
+
+
+def bench_words_to_lines(workdir: Path, repeat: int) -> List[Dict[str, Any]]:
+    from ..services.lyrics_from_audio import words_to_lines
+
+    results = []
+    for count in (500, 5000, 50000):
+        words = fixtures.synthetic_words(count)
+        timing = _timed(lambda: words_to_lines(words), repeat)
+        results.append(_result("words_to_lines", {"words": count}, timing))
+    return results
+
+
+def bench_video_probe(workdir: Path, repeat: int) -> List[Dict[str, Any]]:
+    from ..services.media_ingest import extract_video_metadata, generate_thumbnail
+
+    results = []
+    for width, height, duration in ((640, 360, 10), (1080, 1920, 10), (1920, 1080, 60)):
+        path = str(fixtures.color_bars(workdir, duration=duration, width=width, height=height))
+        params = {"resolution": f"{width}x{height}", "duration": duration}
+        results.append(_result("extract_video_metadata", params, _timed(lambda: extract_video_metadata(path), repeat)))
+        results.append(_result("generate_thumbnail", params, _timed(lambda: generate_thumbnail(path), repeat)))
+    return results
+
+
+def bench_storage(workdir: Path, repeat: int) -> List[Dict[str, Any]]:
+    from ..services import storage
+
+    results = []
+    block = os.urandom(1024 * 1024)
+    for size_mb in (1, 16, 256):
+        source = workdir / f"blob_{size_mb}mb.bin"
+        if not source.exists():
+            with open(source, "wb") as out_file:
+                for _ in range(size_mb):
+                    out_file.write(block)
+
+        def round_trip() -> None:
+            with open(source, "rb") as in_file:
+                stored = storage.upload_file(in_file, f"bench/blob_{size_mb}mb.bin")
+            os.remove(storage.download_to_temp(stored))
+
+        results.append(_result("storage_round_trip", {"size_mb": size_mb}, _timed(round_trip, repeat)))
+    return results
+
+
+def bench_render(workdir: Path, repeat: int) -> List[Dict[str, Any]]:
+    from ..services.rendering import render_video
+
+    audio = fixtures.click_track(workdir, bpm=120, duration=20)
+    clips = [str(fixtures.color_bars(workdir, duration=10 + index, width=1080, height=1920)) for index in range(4)]
+    results = []
+    for cuts in (10, 40):
+        cut_length = 20.0 / cuts
+        timeline = [
+            {
+                "clip_path": clips[index % len(clips)],
+                "video_start": (index * 0.37) % 5,
+                "video_end": (index * 0.37) % 5 + cut_length,
+                "song_start": index * cut_length,
+            }
+            for index in range(cuts)
+        ]
+        for stream_copy in (False, True):
+            output = str(workdir / "render.mp4")
+            timing = _timed(
+                lambda: render_video(
+                    str(audio),
+                    timeline,
+                    [],
+                    output,
+                    progress_logger=None,
+                    stream_copy=stream_copy,
+                    keyframe_tolerance=0.5,
+                ),
+                repeat,
+            )
+            report = timing["last_value"]
+            results.append(
+                _result("render_video", {"cuts": cuts, "sources": len(clips), "stream_copy": stream_copy}, timing, report=report)
+            )
+    return results
+
+
+class _TranscriptionStub(BaseHTTPRequestHandler):
+    words: List[Dict[str, object]] = fixtures.synthetic_words(600)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"text": " ".join(str(word["word"]) for word in self.words), "words": self.words}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def bench_transcription(workdir: Path, repeat: int) -> List[Dict[str, Any]]:
+    from ..services.lyrics_from_audio import TranscriptionClient, words_to_lines
+
+    server = HTTPServer(("127.0.0.1", 0), _TranscriptionStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = TranscriptionClient(api_url=f"http://127.0.0.1:{server.server_port}/transcribe")
+        audio = str(fixtures.click_track(workdir, bpm=120, duration=180))
+
+        def transcribe() -> None:
+            words_to_lines(client.transcribe(audio).words)
+
+        return [_result("transcribe_audio_to_lyrics", {"audio_seconds": 180, "words": 600}, _timed(transcribe, repeat))]
+    finally:
+        server.shutdown()
+
+
+def bench_http(workdir: Path, repeat: int) -> List[Dict[str, Any]]:
+    import redis
+    from fastapi.testclient import TestClient
+
+    from ..app import app
+    from ..db import db_session, init_db
+    from ..models import Lyrics, Project, SourceClip
+    from ..redis_client import get_redis
+
+    try:
+        get_redis().ping()
+    except redis.RedisError as exc:
+        return [{"stage": "http", "skipped": f"Redis unavailable: {exc}"}]
+
+    init_db()
+    with db_session() as session:
+        project = Project(name="bench")
+        session.add(project)
+        session.flush()
+        words = fixtures.synthetic_words(5000)
+        session.add(
+            Lyrics(project_id=project.id, source="bench", raw_text="bench", timed_words=words, timed_lines=[])
+        )
+        for index in range(2000):
+            session.add(
+                SourceClip(project_id=project.id, origin="bench", storage_path=f"videos/bench/{index}.mp4", width=1080)
+            )
+        session.commit()
+        project_id = project.id
+
+    results = []
+    with TestClient(app) as client:
+        endpoints = {
+            "get_lyrics": f"/api/projects/{project_id}/lyrics",
+            "get_lyrics_metadata": f"/api/projects/{project_id}/lyrics?fields=raw_text,updated_at",
+            "list_source_clips": f"/api/projects/{project_id}/source-clips?limit=500",
+            "list_source_clips_ids": f"/api/projects/{project_id}/source-clips?limit=500&fields=id",
+        }
+        for name, path in endpoints.items():
+            results.append(_result("http", {"endpoint": name}, _timed(lambda: client.get(path).raise_for_status(), repeat * 10)))
+
+        etag = client.get(endpoints["list_source_clips"]).headers["ETag"]
+        results.append(
+            _result(
+                "http",
+                {"endpoint": "list_source_clips_not_modified"},
+                _timed(lambda: client.get(endpoints["list_source_clips"], headers={"If-None-Match": etag}), repeat * 10),
+            )
+        )
+    return results
+
+
+STAGES: Dict[str, Callable[[Path, int], List[Dict[str, Any]]]] = {
+    "analyze_audio": bench_analyze_audio,
+    "words_to_lines": bench_words_to_lines,
+    "video_probe": bench_video_probe,
+    "storage": bench_storage,
+    "render_video": bench_render,
+    "transcription": bench_transcription,
+    "http": bench_http,
+}
+
+
+def _environment() -> Dict[str, Any]:
+    ffmpeg = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True, check=False)
+    commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=False)
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": ffmpeg.stdout.splitlines()[0] if ffmpeg.returncode == 0 else None,
+        "git_commit": commit.stdout.strip() or None,
+    }
+
+
+def run_stages(workdir: Path, stages: List[str], repeat: int) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for name in stages:
+        print(f"benchmarking {name}...", file=sys.stderr)
+        try:
+            results.extend(STAGES[name](workdir, repeat))
+        except Exception as exc:  # keep the remaining stages running
+            results.append({"stage": name, "error": f"{type(exc).__name__}: {exc}"})
+    return {"environment": _environment(), "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Beatmatchr benchmark suite.")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--stage", dest="stages", action="append", choices=sorted(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fixtures-dir", default=None, help="Reuse generated fixtures between runs.")
+    args = parser.parse_args(argv)
+
+    workdir_env = os.environ.get(_CHILD_ENV)
+    if workdir_env is None:
+        workdir = Path(tempfile.mkdtemp(prefix="beatmatchr-bench-"))
+        env = {
+            **os.environ,
+            _CHILD_ENV: str(workdir),
+            "DATABASE_URL": f"sqlite+aiosqlite:///{workdir / 'bench.db'}",
+            "SYNC_DATABASE_URL": f"sqlite:///{workdir / 'bench.db'}",
+            "BEATMATCHR_STORAGE": str(workdir / "storage"),
+            "STORAGE_BASE_PATH": str(workdir / "storage"),
+        }
+        try:
+            completed = subprocess.run([sys.executable, "-m", __spec__.name, *(argv or sys.argv[1:])], env=env)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        sys.exit(completed.returncode)
+
+    fixture_dir = Path(args.fixtures_dir) if args.fixtures_dir else Path(workdir_env) / "fixtures"
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    report = run_stages(fixture_dir, args.stages or list(STAGES), args.repeat)
+    with open(args.output, "w") as out_file:
+        json.dump(report, out_file, indent=2, default=str)
+    print(f"wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
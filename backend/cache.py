@@ -0,0 +1,154 @@
+"""Read-through cache for hot, read-mostly API responses.
+
+Entries are keyed by namespace, project and request parameters, and stamped
+with a per-project version kept in Redis. Writers bump the version instead of
+deleting keys, so invalidation is a single ``INCR`` that is visible to every
+API process at once, and entries written under an old version simply expire.
+
+With the ``memory`` backend the entries themselves live in each API process
+and only the version lookup goes to Redis; with the ``redis`` backend entries
+are shared between processes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis
+
+from .config import settings
+from .redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+MAX_LOCAL_ENTRIES = 2048
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def _version_key(namespace: str, project_id: str) -> str:
+    return f"cache:{namespace}:{project_id}:version"
+
+
+def _entry_key(namespace: str, project_id: str, version: str, params: str) -> str:
+    return f"cache:{namespace}:{project_id}:v{version}:{params}"
+
+
+class ReadThroughCache:
+    def __init__(self, backend: str, ttl_seconds: int) -> None:
+        if backend not in {"redis", "memory"}:
+            raise ValueError(f"Unsupported cache backend: {backend}")
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._stats: Dict[str, CacheStats] = {}
+
+    def _stats_for(self, namespace: str) -> CacheStats:
+        return self._stats.setdefault(namespace, CacheStats())
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        project_id: str,
+        loader: Callable[[], Awaitable[Any]],
+        params: str = "",
+    ) -> Any:
+        """Return the cached value or call ``loader`` and cache its result.
+
+        ``loader`` must return a JSON-serializable value. Exceptions raised by
+        the loader (e.g. 404s) propagate and nothing is cached.
+        """
+
+        stats = self._stats_for(namespace)
+        client = get_async_redis()
+        try:
+            version = await client.get(_version_key(namespace, project_id)) or "0"
+            key = _entry_key(namespace, project_id, version, params)
+            cached = await self._get(client, key)
+        except redis.RedisError as exc:
+            stats.errors += 1
+            logger.warning("Cache lookup failed for %s/%s: %s", namespace, project_id, exc)
+            return await loader()
+
+        if cached is not None:
+            stats.hits += 1
+            return cached
+
+        stats.misses += 1
+        value = await loader()
+        try:
+            await self._set(client, key, value)
+        except redis.RedisError as exc:
+            stats.errors += 1
+            logger.warning("Cache store failed for %s/%s: %s", namespace, project_id, exc)
+        return value
+
+    async def _get(self, client: Any, key: str) -> Optional[Any]:
+        if self.backend == "memory":
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._local.pop(key, None)
+                return None
+            self._local.move_to_end(key)
+            return value
+
+        raw = await client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def _set(self, client: Any, key: str, value: Any) -> None:
+        if self.backend == "memory":
+            self._local[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._local.move_to_end(key)
+            while len(self._local) > MAX_LOCAL_ENTRIES:
+                self._local.popitem(last=False)
+            return
+
+        await client.set(key, json.dumps(value), ex=self.ttl_seconds)
+
+    def invalidate(self, namespace: str, project_id: str) -> None:
+        """Invalidate all entries of ``namespace`` for a project (sync callers)."""
+
+        try:
+            get_redis().incr(_version_key(namespace, project_id))
+        except redis.RedisError as exc:
+            logger.warning("Cache invalidation failed for %s/%s: %s", namespace, project_id, exc)
+
+    async def ainvalidate(self, namespace: str, project_id: str) -> None:
+        """Async variant of :meth:`invalidate` for request handlers."""
+
+        try:
+            await get_async_redis().incr(_version_key(namespace, project_id))
+        except redis.RedisError as exc:
+            logger.warning("Cache invalidation failed for %s/%s: %s", namespace, project_id, exc)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters of this process, per namespace."""
+
+        return {namespace: stats.as_dict() for namespace, stats in self._stats.items()}
+
+
+cache = ReadThroughCache(backend=settings.cache_backend, ttl_seconds=settings.cache_ttl_seconds)
+
+LYRICS = "lyrics"
+SOURCE_CLIPS = "source-clips"
@@ -76,10 +76,89 @@ class Settings(BaseSettings):
         default="sqlite:///./beatmatchr.db",
         description="Optional sync URL for background workers",
     )
+    db_pool_size: int = Field(
+        default=int(os.getenv("DB_POOL_SIZE", "10")),
+        description="Persistent connections kept by the async engine per API process.",
+    )
+    db_max_overflow: int = Field(
+        default=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        description="Extra connections the async engine may open under burst load.",
+    )
+    db_pool_timeout: float = Field(
+        default=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        description="Seconds to wait for a pooled connection before failing the request.",
+    )
+    db_pool_recycle: int = Field(
+        default=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        description="Seconds after which pooled connections are recycled.",
+    )
     storage_base_path: Path = Field(
         default=Path(os.getenv("BEATMATCHR_STORAGE", "./storage")),
         description="Base path for file storage when using local filesystem backend.",
     )
+    upload_max_bytes: int = Field(
+        default=int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024**3))),
+        description="Largest file accepted by a resumable upload session.",
+    )
+    media_accel_redirect: Optional[str] = Field(
+        default=os.getenv("MEDIA_ACCEL_REDIRECT"),
+        description="nginx internal location for stored files; when set, /files responses use X-Accel-Redirect.",
+    )
+    admission_max_queue_depth: int = Field(
+        default=int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "5000")),
+        description="Queued messages in a Celery queue above which new work for it is refused with 503.",
+    )
+    admission_max_inflight_per_project: int = Field(
+        default=int(os.getenv("ADMISSION_MAX_INFLIGHT_PER_PROJECT", "500")),
+        description="Queued or running tasks a single project may have before new work is refused with 429.",
+    )
+    admission_project_rate: float = Field(
+        default=float(os.getenv("ADMISSION_PROJECT_RATE", "5")),
+        description="Tasks per second each project may enqueue on average.",
+    )
+    admission_project_burst: int = Field(
+        default=int(os.getenv("ADMISSION_PROJECT_BURST", "100")),
+        description="Tasks a project may enqueue at once before its rate applies.",
+    )
+    admission_global_rate: float = Field(
+        default=float(os.getenv("ADMISSION_GLOBAL_RATE", "50")),
+        description="Tasks per second all projects together may enqueue on average.",
+    )
+    admission_global_burst: int = Field(
+        default=int(os.getenv("ADMISSION_GLOBAL_BURST", "1000")),
+        description="Tasks all projects together may enqueue at once before the global rate applies.",
+    )
+    worker_memory_budget_bytes: int = Field(
+        default=int(os.getenv("WORKER_MEMORY_BUDGET_BYTES", "0")),
+        description="Memory all workers on a host may reserve for estimated task peaks (0: 80% of RAM).",
+    )
+    worker_memory_low_watermark_bytes: int = Field(
+        default=int(os.getenv("WORKER_MEMORY_LOW_WATERMARK_BYTES", str(512 * 1024**2))),
+        description="Available host memory a task must leave free after its estimate to start.",
+    )
+    large_job_bytes: int = Field(
+        default=int(os.getenv("LARGE_JOB_BYTES", str(4 * 1024**3))),
+        description="Estimated peak memory above which tasks are routed to the 'large' queue.",
+    )
+    redis_url: str = Field(
+        default=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+        description="Redis URL used for progress reporting and coordination.",
+    )
+    cache_backend: str = Field(
+        default=os.getenv("CACHE_BACKEND", "redis"),
+        description="Where read-through cache entries live: 'redis' or 'memory' (per process).",
+    )
+    cache_ttl_seconds: int = Field(
+        default=int(os.getenv("CACHE_TTL_SECONDS", "30")),
+        description="Lifetime of read-through cache entries.",
+    )
+    worker_metrics_port: int = Field(
+        default=int(os.getenv("WORKER_METRICS_PORT", "9540")),
+        description=(
+            "Base port on which Celery workers serve Prometheus metrics; each worker profile adds its "
+            "position in PROFILES (0 disables)."
+        ),
+    )
     celery_broker_url: str = Field(
         default=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"),
         description="Broker URL for Celery workers.",
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 
+from . import instrumentation
 from .config import settings
 
 
@@ -14,8 +16,28 @@ SYNC_DATABASE_URL = settings.sync_database_url or settings.database_url
 engine = create_engine(SYNC_DATABASE_URL, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
 
+
+def _async_pool_options(url: str) -> Dict[str, Any]:
+    # SQLite connections are cheap and file-locked, so only server databases
+    # get a tuned connection pool.
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+async_engine = create_async_engine(settings.database_url, **_async_pool_options(settings.database_url))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+instrumentation.instrument_commits()
+
 
 def init_db() -> None:
     """Create all tables in the database."""
@@ -23,6 +45,13 @@ def init_db() -> None:
     Base.metadata.create_all(bind=engine)
 
 
+async def init_async_db() -> None:
+    """Create all tables using the async engine (used by the API process)."""
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
 @contextmanager
 def db_session() -> Iterator[Session]:
     """Provide a transactional scope around a series of operations."""
@@ -35,3 +64,17 @@ def db_session() -> Iterator[Session]:
         raise
     finally:
         session.close()
+
+
+@asynccontextmanager
+async def async_db_session() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of :func:`db_session` for request handlers."""
+
+    session: AsyncSession = AsyncSessionLocal()
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
@@ -0,0 +1,122 @@
+"""Project event bus built on Redis pub/sub.
+
+Workers call :func:`publish_event` when something a client cares about
+changes (a clip was ingested, BPM or lyrics are ready, render progress). Each
+API process runs a single :class:`EventBroker` that pattern-subscribes to all
+project channels once and fans messages out to in-memory queues, so thousands
+of idle SSE connections cost one Redis connection per process rather than one
+each.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+import redis
+
+from .redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "project-events:"
+SUBSCRIBER_QUEUE_SIZE = 100
+
+CLIP_INGESTED = "clip.ingested"
+INGEST_BATCH_COMPLETED = "ingest.batch_completed"
+AUDIO_ANALYZED = "audio.analyzed"
+LYRICS_READY = "lyrics.ready"
+RENDER_PROGRESS = "render.progress"
+
+
+def project_channel(project_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{project_id}"
+
+
+def publish_event(project_id: str, event_type: str, data: Optional[Dict[str, Any]] = None) -> None:
+    """Publish a project event from synchronous code (Celery workers).
+
+    Publishing is best effort: a Redis outage is logged and never fails the
+    task that produced the event.
+    """
+
+    message = {
+        "type": event_type,
+        "project_id": project_id,
+        "data": data or {},
+        "published_at": datetime.utcnow().isoformat(),
+    }
+    try:
+        get_redis().publish(project_channel(project_id), json.dumps(message, default=str))
+    except redis.RedisError as exc:
+        logger.warning("Failed to publish %s for project %s: %s", event_type, project_id, exc)
+
+
+class EventBroker:
+    """Fan-out of Redis project events to local subscriber queues."""
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, project_id: str) -> asyncio.Queue:
+        self._ensure_listening()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, project_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(project_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[project_id]
+
+    def _ensure_listening(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = get_async_redis().pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message.get("type") == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except redis.RedisError as exc:
+                logger.warning("Event subscription lost, reconnecting: %s", exc)
+                await pubsub.close()
+                await asyncio.sleep(1.0)
+
+    def _dispatch(self, channel: str, data: str) -> None:
+        project_id = channel[len(CHANNEL_PREFIX):]
+        for queue in list(self._subscribers.get(project_id, ())):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                # A stalled client only loses its own oldest events.
+                queue.get_nowait()
+                queue.put_nowait(data)
+
+
+broker = EventBroker()
@@ -0,0 +1,265 @@
+"""Stage timings and Prometheus metrics shared by the API and the workers.
+
+* :func:`span` / :func:`traced` time a named stage (``ingest.download``,
+  ``audio.beat_track``...) into ``beatmatchr_stage_seconds``.
+* :func:`run_subprocess` additionally records the child's CPU time, so
+  ffmpeg/ffprobe/yt-dlp work shows up separately from Python time.
+* :func:`record_bytes` counts bytes moved by a stage.
+* :func:`instrument_commits` times every ORM commit as the ``db.commit`` stage.
+* :class:`PeakRss` samples the resident memory of this process and its
+  children (Linux ``/proc`` only; reads 0 elsewhere).
+
+When ``prometheus_client`` is not installed every metric is a no-op. Set
+``PROMETHEUS_MULTIPROC_DIR`` when running several processes (uvicorn or
+prefork workers) so that one scrape aggregates all of them.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import resource
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+_MEMORY_BUCKETS = tuple(float(2**power) for power in range(26, 37))  # 64 MiB .. 64 GiB
+
+
+class _NoopMetric:
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+
+def _histogram(
+    name: str, documentation: str, labels: Tuple[str, ...], buckets: Tuple[float, ...] = _STAGE_BUCKETS
+) -> Any:
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Histogram(name, documentation, labels, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labels: Tuple[str, ...]) -> Any:
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Counter(name, documentation, labels)
+
+
+STAGE_SECONDS = _histogram("beatmatchr_stage_seconds", "Wall time spent in a pipeline stage.", ("stage",))
+STAGE_ERRORS = _counter("beatmatchr_stage_errors_total", "Pipeline stages that raised.", ("stage",))
+SUBPROCESS_CPU_SECONDS = _counter(
+    "beatmatchr_subprocess_cpu_seconds_total", "User+system CPU time of child processes.", ("stage",)
+)
+BYTES_TOTAL = _counter("beatmatchr_bytes_total", "Bytes moved by a pipeline stage.", ("stage",))
+TASK_QUEUE_WAIT_SECONDS = _histogram(
+    "beatmatchr_task_queue_wait_seconds", "Time between publishing a task and a worker starting it.", ("task",)
+)
+TASK_SECONDS = _histogram("beatmatchr_task_seconds", "Run time of Celery tasks.", ("task", "state"))
+TASK_PEAK_RSS_BYTES = _histogram(
+    "beatmatchr_task_peak_rss_bytes",
+    "Peak resident memory of a task's process tree.",
+    ("task",),
+    buckets=_MEMORY_BUCKETS,
+)
+MEMORY_WATERMARK_EXCEEDED = _counter(
+    "beatmatchr_memory_watermark_exceeded_total", "Tasks whose memory rose well above their estimate.", ("task",)
+)
+HTTP_REQUEST_SECONDS = _histogram(
+    "beatmatchr_http_request_seconds", "API request latency by route.", ("method", "route", "status")
+)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as ``stage``."""
+
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        logger.debug("stage %s took %.3fs", stage, elapsed)
+
+
+def traced(stage: str) -> Callable[[F], F]:
+    """Decorator form of :func:`span`."""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def record_bytes(stage: str, count: int) -> None:
+    BYTES_TOTAL.labels(stage).inc(count)
+
+
+def _children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_subprocess(stage: str, command: List[str], **kwargs: Any) -> subprocess.CompletedProcess:
+    """``subprocess.run`` that records wall time and child CPU time for ``stage``.
+
+    Child CPU time is read from ``RUSAGE_CHILDREN``, which is process wide; in
+    thread-pool workers concurrent subprocesses can be attributed to each
+    other's stages.
+    """
+
+    cpu_before = _children_cpu_seconds()
+    with span(stage):
+        try:
+            return subprocess.run(command, **kwargs)
+        finally:
+            SUBPROCESS_CPU_SECONDS.labels(stage).inc(max(_children_cpu_seconds() - cpu_before, 0.0))
+
+
+def _process_rss(pid: str) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _children(pid: str) -> Iterable[str]:
+    for task_dir in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            yield from (task_dir / "children").read_text().split()
+        except OSError:
+            continue
+
+
+def tree_rss() -> int:
+    """Resident bytes of this process and its descendants (ffmpeg, pool workers)."""
+
+    pending = [str(os.getpid())]
+    total = 0
+    while pending:
+        pid = pending.pop()
+        total += _process_rss(pid)
+        pending.extend(_children(pid))
+    return total
+
+
+class PeakRss(threading.Thread):
+    """Track the peak of :func:`tree_rss` from a background thread until :meth:`stop`.
+
+    Unlike ``ru_maxrss``, which is a lifetime high-water mark of the process,
+    this measures only the sampled window, so it stays meaningful in reused
+    prefork children. Subclasses can override :meth:`sample` to react to
+    each reading.
+    """
+
+    interval = 0.5
+
+    def __init__(self, name: str = "rss-sampler") -> None:
+        super().__init__(name=name, daemon=True)
+        self.peak = 0
+        self._done = threading.Event()
+
+    def sample(self, rss: int) -> None:
+        pass
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            rss = tree_rss()
+            self.peak = max(self.peak, rss)
+            self.sample(rss)
+            self._done.wait(self.interval)
+
+    def stop(self) -> int:
+        """Stop sampling and return the peak in bytes."""
+
+        self._done.set()
+        self.join()
+        return max(self.peak, tree_rss())
+
+
+def _before_commit(session: Session) -> None:
+    session.info["commit_started"] = time.perf_counter()
+
+
+def _after_commit(session: Session) -> None:
+    started: Optional[float] = session.info.pop("commit_started", None)
+    if started is not None:
+        STAGE_SECONDS.labels("db.commit").observe(time.perf_counter() - started)
+
+
+def instrument_commits() -> None:
+    """Time every ORM commit (sync and async sessions) as ``db.commit``."""
+
+    if not event.contains(Session, "before_commit", _before_commit):
+        event.listen(Session, "before_commit", _before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+
+
+def metrics_registry() -> Any:
+    """Registry to expose: aggregated across processes in multiprocess mode."""
+
+    if prometheus_client is None:
+        return None
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the Prometheus exposition payload and its content type."""
+
+    if prometheus_client is None:
+        return b"# prometheus_client is not installed\n", "text/plain; charset=utf-8"
+    return prometheus_client.generate_latest(metrics_registry()), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve ``/metrics`` on ``port`` from a background thread (workers)."""
+
+    if prometheus_client is None:
+        logger.warning("prometheus_client not installed; worker metrics are disabled")
+        return
+    prometheus_client.start_http_server(port, registry=metrics_registry())
+    logger.info("Serving worker metrics on port %s", port)
+
+
+def mark_process_dead(pid: int) -> None:
+    if prometheus_client is not None and os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
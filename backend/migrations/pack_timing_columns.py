@@ -0,0 +1,108 @@
+"""Convert JSON timing columns to the packed encoding of :mod:`backend.services.timing_codec`.
+
+``Lyrics.timed_words``, ``Lyrics.timed_lines`` and ``AudioTrack.beat_grid``
+used to be JSON columns. ``create_all`` does not alter existing tables, so
+databases created before the packed encoding need this once::
+
+    python -m backend.migrations.pack_timing_columns
+
+It changes the column types to binary (PostgreSQL and MySQL; SQLite stores
+either form as is) and rewrites every JSON value in packed form. Rows are
+converted in batches and the script can be re-run safely.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import LargeBinary, inspect, select, text, type_coerce, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.types import JSON, String
+
+from ..db import db_session, engine
+from ..models import AudioTrack, Lyrics
+from ..services import timing_codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+COLUMNS = (
+    (Lyrics, "timed_words"),
+    (Lyrics, "timed_lines"),
+    (AudioTrack, "beat_grid"),
+)
+
+_ALTER_STATEMENTS = {
+    "postgresql": "ALTER TABLE {table} ALTER COLUMN {column} TYPE BYTEA USING convert_to({column}::text, 'UTF8')",
+    "mysql": "ALTER TABLE {table} MODIFY {column} LONGBLOB",
+}
+
+
+def _convert_column_type(connection: Connection, table: str, column: str) -> bool:
+    """Change a JSON/text column to binary; returns whether it was altered."""
+
+    statement = _ALTER_STATEMENTS.get(connection.dialect.name)
+    if statement is None:
+        return False
+    current = {info["name"]: info["type"] for info in inspect(connection).get_columns(table)}.get(column)
+    if not isinstance(current, (JSON, String)):
+        return False
+    connection.execute(text(statement.format(table=table, column=column)))
+    return True
+
+
+def _is_packed(value: object) -> bool:
+    # SQLite hands back legacy JSON stored as TEXT as str.
+    return isinstance(value, (bytes, bytearray, memoryview)) and timing_codec.is_packed(bytes(value))
+
+
+def _repack(model: type, column: str, batch_size: int) -> int:
+    """Rewrite the JSON values of ``model.column`` in packed form; returns rows converted."""
+
+    attribute = getattr(model, column)
+    raw = type_coerce(attribute, LargeBinary)
+    converted = 0
+    last_id = ""
+    while True:
+        with db_session() as session:
+            rows: List[Tuple[str, object]] = session.execute(
+                select(model.id, raw)
+                .where(attribute.is_not(None), model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return converted
+            last_id = rows[-1][0]
+            legacy_ids = [row_id for row_id, value in rows if not _is_packed(value)]
+            if legacy_ids:
+                # Loading through the column type decodes the legacy JSON; writing
+                # it back through the same type stores the packed form.
+                values = session.execute(select(model.id, attribute).where(model.id.in_(legacy_ids))).all()
+                session.execute(update(model), [{"id": row_id, column: value} for row_id, value in values])
+                session.commit()
+                converted += len(values)
+
+
+def migrate(batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    with engine.begin() as connection:
+        for model, column in COLUMNS:
+            if _convert_column_type(connection, model.__tablename__, column):
+                logger.info("Changed %s.%s to a binary column", model.__tablename__, column)
+    for model, column in COLUMNS:
+        converted = _repack(model, column, batch_size)
+        logger.info("Packed %d %s.%s values", converted, model.__tablename__, column)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert JSON timing columns to the packed encoding.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
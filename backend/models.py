@@ -1,12 +1,81 @@
 from __future__ import annotations
 
+import json
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, JSON, String, Text, Integer
-from sqlalchemy.orm import relationship
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, LargeBinary, String, Text, Integer
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.types import TypeDecorator
 
 from .db import Base, db_session
+from .services import timing_codec
+
+
+def _legacy_json(value: Any) -> Any:
+    # Rows written before the packed encoding hold JSON, which drivers return
+    # parsed, as text or as bytes (after a column type conversion).
+    if isinstance(value, (list, dict)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value).decode("utf-8")
+    return json.loads(value)
+
+
+def _packed(value: Any) -> Optional[bytes]:
+    if isinstance(value, (bytes, bytearray, memoryview)) and timing_codec.is_packed(bytes(value)):
+        return bytes(value)
+    return None
+
+
+class PackedTimedItems(TypeDecorator):
+    """Timed words/lines stored with :mod:`timing_codec` instead of JSON.
+
+    Legacy JSON values are still read; ``python -m backend.migrations.pack_timing_columns``
+    converts them.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, text_key: str) -> None:
+        super().__init__()
+        self.text_key = text_key
+
+    def process_bind_param(self, value: Optional[List[Dict[str, Any]]], dialect: Any) -> Optional[bytes]:
+        if value is None:
+            return None
+        return timing_codec.encode_timed_items(value, self.text_key)
+
+    def process_result_value(self, value: Optional[bytes], dialect: Any) -> Optional[List[Dict[str, Any]]]:
+        if value is None:
+            return None
+        packed = _packed(value)
+        if packed is None:
+            return _legacy_json(value)
+        return timing_codec.decode_timed_items(packed, self.text_key)
+
+
+class PackedFloats(TypeDecorator):
+    """List of floats (e.g. beat times) stored as packed float32."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[List[float]], dialect: Any) -> Optional[bytes]:
+        if value is None:
+            return None
+        return timing_codec.encode_floats(value)
+
+    def process_result_value(self, value: Optional[bytes], dialect: Any) -> Optional[List[float]]:
+        if value is None:
+            return None
+        packed = _packed(value)
+        if packed is None:
+            return _legacy_json(value)
+        return timing_codec.decode_floats(packed)
 
 
 class TimestampMixin:
@@ -37,9 +106,11 @@ class AudioTrack(Base, TimestampMixin):
     project_id = Column(String, ForeignKey("projects.id"), nullable=False, index=True)
     storage_path = Column(Text, nullable=False)
     local_path = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
     duration_seconds = Column(Float, nullable=True)
     bpm = Column(Float, nullable=True)
-    beat_grid = Column(JSON, nullable=True)
+    # Deferred so metadata queries never load or decode the grid.
+    beat_grid = deferred(Column(PackedFloats, nullable=True))
 
     project = relationship("Project", back_populates="audio_tracks")
 
@@ -60,6 +131,11 @@ class SourceClip(Base, TimestampMixin):
 
     project = relationship("Project", back_populates="source_clips")
 
+    __table_args__ = (
+        # Supports keyset pagination of a project's clips ordered by (created_at, id).
+        Index("ix_source_clips_project_created_id", "project_id", "created_at", "id"),
+    )
+
 
 class Lyrics(Base, TimestampMixin):
     __tablename__ = "lyrics"
@@ -68,15 +144,48 @@ class Lyrics(Base, TimestampMixin):
     project_id = Column(String, ForeignKey("projects.id"), nullable=False, unique=True, index=True)
     source = Column(String, nullable=False)
     raw_text = Column(Text, nullable=False)
-    timed_words = Column(JSON, nullable=True)
-    timed_lines = Column(JSON, nullable=True)
+    timed_words = deferred(Column(PackedTimedItems("word"), nullable=True))
+    timed_lines = deferred(Column(PackedTimedItems("text"), nullable=True))
 
     project = relationship("Project", back_populates="lyrics")
 
 
+class AudioTranscription(Base, TimestampMixin):
+    """The transcription of one audio track, kept for reuse by copies of the song."""
+
+    __tablename__ = "audio_transcriptions"
+
+    audio_track_id = Column(String, ForeignKey("audio_tracks.id", ondelete="CASCADE"), primary_key=True)
+    raw_text = Column(Text, nullable=False)
+    timed_words = deferred(Column(PackedTimedItems("word"), nullable=True))
+    timed_lines = deferred(Column(PackedTimedItems("text"), nullable=True))
+
+
+class AudioFingerprint(Base, TimestampMixin):
+    __tablename__ = "audio_fingerprints"
+
+    audio_track_id = Column(String, ForeignKey("audio_tracks.id", ondelete="CASCADE"), primary_key=True)
+    frame_count = Column(Integer, nullable=False)
+    # Little-endian uint32 sub-fingerprints; only loaded to verify a match.
+    codes = deferred(Column(LargeBinary, nullable=False))
+
+
+class FingerprintKey(Base):
+    """Sampled sub-fingerprints of every fingerprinted track, looked up by ``code``."""
+
+    __tablename__ = "audio_fingerprint_keys"
+
+    audio_track_id = Column(String, ForeignKey("audio_tracks.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    code = Column(Integer, nullable=False, index=True)
+
+
 __all__ = [
     "Project",
     "AudioTrack",
+    "AudioFingerprint",
+    "AudioTranscription",
+    "FingerprintKey",
     "SourceClip",
     "Lyrics",
     "db_session",
@@ -0,0 +1,23 @@
+"""Shared Redis connection used for progress reporting and coordination."""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from .config import settings
+
+
+@lru_cache()
+def get_redis() -> redis.Redis:
+    """Return a cached Redis client for :attr:`Settings.redis_url`."""
+
+    return redis.Redis.from_url(settings.redis_url, decode_responses=True)
+
+
+@lru_cache()
+def get_async_redis() -> aioredis.Redis:
+    """Return a cached asyncio Redis client for use inside request handlers."""
+
+    return aioredis.Redis.from_url(settings.redis_url, decode_responses=True)
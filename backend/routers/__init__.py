@@ -1,5 +1,5 @@
 """API routers for the Beatmatchr service."""
 
-from . import audio, lyrics, media
+from . import audio, events, files, lyrics, media, render, uploads
 
-__all__ = ["audio", "lyrics", "media"]
+__all__ = ["audio", "events", "files", "lyrics", "media", "render", "uploads"]
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import hashlib
 import uuid
 
 from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
 
-from ..db import db_session
+from .. import admission
+from ..db import async_db_session
 from ..models import AudioTrack, Project
 from ..services import storage
-from ..workers.tasks import task_analyze_audio, task_transcribe_lyrics
+from ..workers import dispatch, memory
 
 router = APIRouter(prefix="/projects/{project_id}/audio", tags=["audio"])
 
@@ -22,30 +25,61 @@ async def upload_audio(project_id: str, file: UploadFile = File(...)) -> dict:
     storage_dest = f"audio/{project_id}/{audio_id}{extension}"
     storage_path = ""
 
+    # Sessions are kept short: no pooled connection is held while the file streams.
+    async with async_db_session() as session:
+        project = await session.get(Project, project_id)
+        if project is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    ticket = await admission.admit(project_id, dispatch.ANALYZE_AUDIO, cost=2)
+
+    # Until both tasks are published, a failure gives the admitted slots back.
+    published = 0
     try:
-        with db_session() as session:
-            project = session.query(Project).filter_by(id=project_id).one_or_none()
-            if project is None:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-
-            file.file.seek(0)
-            storage_path = storage.upload_file(file.file, storage_dest)
-
-            audio_track = AudioTrack(
-                id=audio_id,
-                project_id=project_id,
-                storage_path=storage_path,
-            )
-            session.add(audio_track)
-            session.commit()
-    finally:
-        file.file.close()
-
-    if not storage_path:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to store audio file")
-
-    task_analyze_audio.delay(audio_track_id=audio_id)
-    task_transcribe_lyrics.delay(project_id=project_id, audio_track_id=audio_id)
+        try:
+            await file.seek(0)
+            content_hash = hashlib.sha256()
+            storage_path = await storage.upload_file_async(file, storage_dest, hasher=content_hash)
+        finally:
+            await file.close()
+
+        if not storage_path:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to store audio file")
+
+        try:
+            async with async_db_session() as session:
+                audio_track = AudioTrack(
+                    id=audio_id,
+                    project_id=project_id,
+                    storage_path=storage_path,
+                    content_hash=content_hash.hexdigest(),
+                )
+                session.add(audio_track)
+                await session.commit()
+        except Exception:
+            await run_in_threadpool(storage.delete_file, storage_path)
+            raise
+
+        file_size = await run_in_threadpool(storage.stored_size, storage_path)
+        await run_in_threadpool(
+            dispatch.enqueue,
+            dispatch.ANALYZE_AUDIO,
+            {"audio_track_id": audio_id},
+            **memory.placement(
+                dispatch.ANALYZE_AUDIO,
+                memory.estimate_analysis(None, file_size),
+                ticket.task_options(0),
+            ),
+        )
+        published = 1
+        await run_in_threadpool(
+            dispatch.enqueue,
+            dispatch.TRANSCRIBE_LYRICS,
+            {"project_id": project_id, "audio_track_id": audio_id},
+            **ticket.task_options(1),
+        )
+    except Exception:
+        await admission.release_async(ticket, published)
+        raise
 
     return {
         "audio_track_id": audio_id,
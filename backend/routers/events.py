@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from ..db import async_db_session
+from ..events import broker
+from ..models import Project
+
+router = APIRouter(prefix="/projects/{project_id}/events", tags=["events"])
+
+HEARTBEAT_SECONDS = 15.0
+
+
+async def _event_stream(request: Request, project_id: str) -> AsyncIterator[str]:
+    queue = broker.subscribe(project_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                # Comment lines keep proxies from closing idle connections.
+                yield ": keep-alive\n\n"
+                continue
+            event_type = json.loads(data).get("type", "message")
+            yield f"event: {event_type}\ndata: {data}\n\n"
+    finally:
+        broker.unsubscribe(project_id, queue)
+
+
+@router.get("")
+async def stream_project_events(project_id: str, request: Request) -> StreamingResponse:
+    """Server-sent event stream of processing updates for a project."""
+
+    async with async_db_session() as session:
+        project = await session.get(Project, project_id)
+        if project is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    return StreamingResponse(
+        _event_stream(request, project_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,233 @@
+"""Serve stored media and thumbnails with Range, validators and zero-copy sends.
+
+``GET /files/{storage_path}`` serves any path returned by the API
+(``SourceClip.storage_path``, ``thumbnail_path``, ``AudioTrack.storage_path``).
+Stored objects are written once under unique names, so responses are cached
+as immutable and validated by a strong ``ETag`` built from the content's
+SHA-256. The digest is computed once per file in the background and shared
+through Redis; until it is known, responses carry only ``Last-Modified``.
+
+The body is sent with the ASGI ``zerocopysend`` extension (``sendfile``) when
+the server offers it. Behind nginx, set ``MEDIA_ACCEL_REDIRECT`` to an
+``internal`` location aliasing the storage directory and the body is handed
+off with ``X-Accel-Redirect`` instead, leaving Python to answer headers only.
+"""
+from __future__ import annotations
+
+import asyncio
+import mimetypes
+import os
+import re
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import aiofiles
+import redis
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from ..config import settings
+from ..redis_client import get_async_redis
+from ..services import storage
+
+router = APIRouter(prefix="/files", tags=["files"])
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+SEND_CHUNK_SIZE = 256 * 1024
+MAX_LOCAL_ETAGS = 4096
+ETAG_TTL_SECONDS = 30 * 24 * 60 * 60
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# (storage path, size, mtime_ns) -> strong ETag, per process.
+_etags: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_hashing: Dict[Tuple[str, int, int], "asyncio.Task[None]"] = {}
+
+
+def _etag_key(identity: Tuple[str, int, int]) -> str:
+    path, size, mtime_ns = identity
+    return f"media-etag:{path}:{size}:{mtime_ns}"
+
+
+def _remember(identity: Tuple[str, int, int], etag: str) -> None:
+    _etags[identity] = etag
+    _etags.move_to_end(identity)
+    while len(_etags) > MAX_LOCAL_ETAGS:
+        _etags.popitem(last=False)
+
+
+async def _hash_in_background(identity: Tuple[str, int, int], local_path: Path) -> None:
+    try:
+        digest = await run_in_threadpool(storage.hash_file, str(local_path))
+        etag = f'"sha256-{digest}"'
+        _remember(identity, etag)
+        await get_async_redis().set(_etag_key(identity), etag, ex=ETAG_TTL_SECONDS)
+    except (OSError, redis.RedisError):
+        pass
+    finally:
+        _hashing.pop(identity, None)
+
+
+async def _strong_etag(identity: Tuple[str, int, int], local_path: Path) -> Optional[str]:
+    """Return the file's ETag if known, scheduling its computation otherwise."""
+
+    etag = _etags.get(identity)
+    if etag is not None:
+        return etag
+    try:
+        etag = await get_async_redis().get(_etag_key(identity))
+    except redis.RedisError:
+        etag = None
+    if etag is not None:
+        _remember(identity, etag)
+        return etag
+    if identity not in _hashing:
+        _hashing[identity] = asyncio.create_task(_hash_in_background(identity, local_path))
+    return None
+
+
+def _etag_matches(header: Optional[str], etag: Optional[str]) -> bool:
+    if not header or etag is None:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified_since(header: Optional[str], mtime: float) -> bool:
+    if not header:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Return the inclusive byte range requested, ``None`` for the whole file.
+
+    Only single ranges are honoured; anything else is answered with the full
+    body, which HTTP permits. Raises 416 for a range outside the file.
+    """
+
+    match = _RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+class _FileRangeResponse(Response):
+    """Send ``length`` bytes of ``path`` from ``offset`` without buffering the file."""
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int,
+        length: int,
+        status_code: int,
+        headers: Dict[str, str],
+        send_body: bool,
+    ) -> None:
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.headers["Content-Length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as in_file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": in_file,
+                        "offset": self.offset,
+                        "count": self.length,
+                    }
+                )
+            return
+
+        remaining = self.length
+        async with aiofiles.open(self.path, "rb") as in_file:
+            await in_file.seek(self.offset)
+            while remaining > 0:
+                chunk = await in_file.read(min(SEND_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+async def serve_file(path: str, request: Request) -> Response:
+    try:
+        local_path = await run_in_threadpool(storage.stored_file, path)
+        stat = await run_in_threadpool(os.stat, local_path)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from exc
+
+    identity = (path, stat.st_size, stat.st_mtime_ns)
+    etag = await _strong_etag(identity, local_path)
+    headers: Dict[str, Any] = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": CACHE_CONTROL,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+    }
+    if etag is not None:
+        headers["ETag"] = etag
+
+    if_none_match = request.headers.get("if-none-match")
+    if _etag_matches(if_none_match, etag) or (
+        if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), stat.st_mtime)
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.media_accel_redirect:
+        # nginx serves the body (and any Range) straight from disk.
+        headers["X-Accel-Redirect"] = f"{settings.media_accel_redirect.rstrip('/')}/{path}"
+        return Response(status_code=status.HTTP_200_OK, headers=headers)
+
+    byte_range = _parse_range(request.headers.get("range"), stat.st_size)
+    if_range = request.headers.get("if-range")
+    if byte_range is not None and if_range and if_range not in (etag, headers["Last-Modified"]):
+        byte_range = None
+
+    if byte_range is None:
+        start, end, status_code = 0, stat.st_size - 1, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+    return _FileRangeResponse(
+        local_path,
+        offset=start,
+        length=end - start + 1,
+        status_code=status_code,
+        headers=headers,
+        send_body=request.method == "GET",
+    )
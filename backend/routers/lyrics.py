@@ -1,59 +1,89 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
 
-from ..db import db_session
+from fastapi import APIRouter, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+
+from ..cache import LYRICS, cache
+from ..db import async_db_session
 from ..models import Lyrics, Project
 
 router = APIRouter(prefix="/projects/{project_id}/lyrics", tags=["lyrics"])
 
+LYRICS_FIELDS = ("project_id", "source", "raw_text", "timed_lines", "timed_words", "created_at", "updated_at")
+# Stored packed and deferred; only loaded and decoded when requested.
+TIMED_FIELDS = ("timed_lines", "timed_words")
+
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(LYRICS_FIELDS)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - set(LYRICS_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return [name for name in LYRICS_FIELDS if name in requested]
+
+
+def _select_lyrics(project_id: str, selected: List[str]):
+    options = [undefer(getattr(Lyrics, name)) for name in TIMED_FIELDS if name in selected]
+    return select(Lyrics).filter_by(project_id=project_id).options(*options)
+
+
+def _serialize_lyrics(lyrics: Lyrics, selected: List[str]) -> dict:
+    payload = {}
+    for name in selected:
+        value = getattr(lyrics, name)
+        payload[name] = (value or []) if name in TIMED_FIELDS else value
+    return jsonable_encoder(payload)
+
 
 @router.get("")
-def get_lyrics(project_id: str) -> dict:
-    with db_session() as session:
-        project = session.query(Project).filter_by(id=project_id).one_or_none()
-        if project is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+async def get_lyrics(project_id: str, fields: Optional[str] = None) -> dict:
+    """Return the project's lyrics, optionally limited to a comma separated ``fields`` subset."""
 
-        lyrics = session.query(Lyrics).filter_by(project_id=project_id).one_or_none()
-        if lyrics is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lyrics not found")
+    selected = _parse_fields(fields)
 
-        return {
-            "project_id": lyrics.project_id,
-            "source": lyrics.source,
-            "raw_text": lyrics.raw_text,
-            "timed_lines": lyrics.timed_lines or [],
-            "timed_words": lyrics.timed_words or [],
-            "created_at": lyrics.created_at,
-            "updated_at": lyrics.updated_at,
-        }
+    async def load() -> dict:
+        async with async_db_session() as session:
+            project = await session.get(Project, project_id)
+            if project is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+            result = await session.execute(_select_lyrics(project_id, selected))
+            lyrics = result.scalar_one_or_none()
+            if lyrics is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lyrics not found")
+
+            return _serialize_lyrics(lyrics, selected)
+
+    return await cache.get_or_load(LYRICS, project_id, load, params=",".join(selected))
 
 
 @router.put("")
-def update_lyrics(project_id: str, payload: dict) -> dict:
+async def update_lyrics(project_id: str, payload: dict) -> dict:
     new_text = payload.get("raw_text")
     if not isinstance(new_text, str) or not new_text.strip():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="raw_text must be provided")
 
-    with db_session() as session:
-        project = session.query(Project).filter_by(id=project_id).one_or_none()
+    async with async_db_session() as session:
+        project = await session.get(Project, project_id)
         if project is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-        lyrics = session.query(Lyrics).filter_by(project_id=project_id).one_or_none()
+        result = await session.execute(_select_lyrics(project_id, list(LYRICS_FIELDS)))
+        lyrics = result.scalar_one_or_none()
         if lyrics is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lyrics not found")
 
         lyrics.raw_text = new_text.strip()
-        session.commit()
-
-        return {
-            "project_id": lyrics.project_id,
-            "source": lyrics.source,
-            "raw_text": lyrics.raw_text,
-            "timed_lines": lyrics.timed_lines or [],
-            "timed_words": lyrics.timed_words or [],
-            "created_at": lyrics.created_at,
-            "updated_at": lyrics.updated_at,
-        }
+        await session.commit()
+        await cache.ainvalidate(LYRICS, project_id)
+
+        return _serialize_lyrics(lyrics, list(LYRICS_FIELDS))
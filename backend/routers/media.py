@@ -1,28 +1,56 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import json
 import uuid
-from typing import List
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, File, Header, HTTPException, Query, Response, UploadFile, status
+from celery import chord, group
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from ..db import db_session
+from .. import admission
+from ..cache import SOURCE_CLIPS, cache
+from ..db import async_db_session
 from ..models import Project, SourceClip
-from ..services import storage
-from ..workers.tasks import task_ingest_url, task_process_uploaded_video
+from ..services import ingest_batches, storage
+from ..workers import dispatch
 
 router = APIRouter(prefix="/projects/{project_id}/source-clips", tags=["source-clips"])
 
+DEFAULT_INGEST_CHUNK_SIZE = 25
+MAX_INGEST_CHUNK_SIZE = 100
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+CLIP_FIELDS = (
+    "id",
+    "origin",
+    "original_url",
+    "storage_path",
+    "thumbnail_path",
+    "duration_seconds",
+    "width",
+    "height",
+    "fps",
+    "created_at",
+    "updated_at",
+)
 
-def get_project(session: Session, project_id: str) -> Project:
-    project = session.query(Project).filter_by(id=project_id).one_or_none()
+
+async def get_project(session: AsyncSession, project_id: str) -> Project:
+    project = await session.get(Project, project_id)
     if project is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     return project
 
 
 @router.post("/urls")
-def enqueue_url_ingest(project_id: str, payload: dict) -> dict:
+async def enqueue_url_ingest(project_id: str, payload: dict) -> dict:
     urls = payload.get("urls") or []
     if not isinstance(urls, list) or not urls:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="urls must be a non-empty list")
@@ -32,15 +60,100 @@ def enqueue_url_ingest(project_id: str, payload: dict) -> dict:
         if not isinstance(value, str) or not value.strip():
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="All URLs must be non-empty strings")
 
-    with db_session() as session:
-        get_project(session, project_id)
+    async with async_db_session() as session:
+        await get_project(session, project_id)
+    ticket = await admission.admit(project_id, dispatch.INGEST_URL, cost=len(urls))
+    published = 0
+
+    def enqueue() -> None:
+        nonlocal published
+        for index, url in enumerate(urls):
+            dispatch.enqueue(
+                dispatch.INGEST_URL,
+                {"project_id": project_id, "input_url": url, "origin": origin},
+                **ticket.task_options(index),
+            )
+            published += 1
 
-    for url in urls:
-        task_ingest_url.delay(project_id=project_id, input_url=url, origin=origin)
+    try:
+        await run_in_threadpool(enqueue)
+    except Exception:
+        await admission.release_async(ticket, published)
+        raise
 
     return {"status": "queued", "count": len(urls)}
 
 
+@router.post("/urls/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_bulk_url_ingest(project_id: str, payload: dict) -> dict:
+    """Import many URLs (e.g. a playlist) as one Celery chord.
+
+    URLs are de-duplicated and split into chunks of ``chunk_size``; each chunk
+    is one task that bulk-inserts its clips, and a callback records the
+    outcome of the whole batch.
+    """
+
+    urls = payload.get("urls") or []
+    if not isinstance(urls, list) or not urls:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="urls must be a non-empty list")
+    if any(not isinstance(value, str) or not value.strip() for value in urls):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="All URLs must be non-empty strings")
+    origin = payload.get("origin") or "url"
+    try:
+        chunk_size = int(payload.get("chunk_size") or DEFAULT_INGEST_CHUNK_SIZE)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="chunk_size must be an integer")
+    chunk_size = max(1, min(chunk_size, MAX_INGEST_CHUNK_SIZE))
+
+    async with async_db_session() as session:
+        await get_project(session, project_id)
+
+    unique_urls = list(dict.fromkeys(url.strip() for url in urls))
+    chunks = [unique_urls[index:index + chunk_size] for index in range(0, len(unique_urls), chunk_size)]
+    batch_id = str(uuid.uuid4())
+    ticket = await admission.admit(project_id, dispatch.INGEST_URL_BATCH, cost=len(chunks))
+
+    def enqueue() -> None:
+        # Written before publishing: the chord callback merges its outcome into this record.
+        ingest_batches.write_batch_status(
+            batch_id,
+            project_id=project_id,
+            state="queued",
+            url_count=len(unique_urls),
+            chunks=len(chunks),
+        )
+        header = group(
+            dispatch.signature(
+                dispatch.INGEST_URL_BATCH, project_id=project_id, input_urls=chunk, origin=origin
+            ).set(**ticket.task_options(index))
+            for index, chunk in enumerate(chunks)
+        )
+        callback = dispatch.signature(dispatch.INGEST_BATCH_COMPLETE, project_id=project_id, batch_id=batch_id)
+        callback.link_error(dispatch.signature(dispatch.INGEST_BATCH_FAILED, project_id=project_id, batch_id=batch_id))
+        chord(header)(callback)
+
+    try:
+        await run_in_threadpool(enqueue)
+    except Exception as exc:
+        await run_in_threadpool(ingest_batches.write_batch_status, batch_id, state="failed", error=str(exc))
+        # The chord does not report how many chunk tasks went out before the
+        # failure, so every slot is released. Chunks that were published still
+        # release their (already removed) ids when they finish, so this only
+        # under-counts the project's in-flight work until then.
+        await admission.release_async(ticket)
+        raise
+
+    return {"status": "queued", "batch_id": batch_id, "count": len(unique_urls), "chunks": len(chunks)}
+
+
+@router.get("/urls/batches/{batch_id}")
+def get_bulk_ingest_status(project_id: str, batch_id: str) -> dict:
+    batch = ingest_batches.read_batch_status(batch_id)
+    if batch is None or batch.get("project_id") != project_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return batch
+
+
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
 async def upload_source_clip(project_id: str, file: UploadFile = File(...)) -> dict:
     if not file.content_type or not file.content_type.startswith("video/"):
@@ -51,29 +164,47 @@ async def upload_source_clip(project_id: str, file: UploadFile = File(...)) -> d
     storage_dest = f"videos/{project_id}/{clip_id}{extension}"
     storage_path = ""
 
+    # Sessions are kept short: no pooled connection is held while the file streams.
+    async with async_db_session() as session:
+        await get_project(session, project_id)
+    ticket = await admission.admit(project_id, dispatch.PROCESS_UPLOADED_VIDEO)
+
+    # Until the task is published, a failure gives the admitted slot back.
     try:
-        with db_session() as session:
-            get_project(session, project_id)
-
-            file.file.seek(0)
-            storage_path = storage.upload_file(file.file, storage_dest)
-
-            clip = SourceClip(
-                id=clip_id,
-                project_id=project_id,
-                origin="upload",
-                original_url=None,
-                storage_path=storage_path,
-            )
-            session.add(clip)
-            session.commit()
-    finally:
-        file.file.close()
+        try:
+            await file.seek(0)
+            storage_path = await storage.upload_file_async(file, storage_dest)
+        finally:
+            await file.close()
+
+        if not storage_path:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to store uploaded file")
 
-    if not storage_path:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to store uploaded file")
+        try:
+            async with async_db_session() as session:
+                clip = SourceClip(
+                    id=clip_id,
+                    project_id=project_id,
+                    origin="upload",
+                    original_url=None,
+                    storage_path=storage_path,
+                )
+                session.add(clip)
+                await session.commit()
+        except Exception:
+            await run_in_threadpool(storage.delete_file, storage_path)
+            raise
+        await cache.ainvalidate(SOURCE_CLIPS, project_id)
 
-    task_process_uploaded_video.delay(source_clip_id=clip_id)
+        await run_in_threadpool(
+            dispatch.enqueue,
+            dispatch.PROCESS_UPLOADED_VIDEO,
+            {"source_clip_id": clip_id},
+            **ticket.task_options(),
+        )
+    except Exception:
+        await admission.release_async(ticket)
+        raise
 
     return {
         "id": clip_id,
@@ -84,25 +215,122 @@ async def upload_source_clip(project_id: str, file: UploadFile = File(...)) -> d
     }
 
 
-@router.get("")
-def list_source_clips(project_id: str) -> List[dict]:
-    with db_session() as session:
-        get_project(session, project_id)
-        clips = session.query(SourceClip).filter_by(project_id=project_id).order_by(SourceClip.created_at.asc()).all()
-
-        return [
-            {
-                "id": clip.id,
-                "origin": clip.origin,
-                "original_url": clip.original_url,
-                "storage_path": clip.storage_path,
-                "thumbnail_path": clip.thumbnail_path,
-                "duration_seconds": clip.duration_seconds,
-                "width": clip.width,
-                "height": clip.height,
-                "fps": clip.fps,
-                "created_at": clip.created_at,
-                "updated_at": clip.updated_at,
-            }
-            for clip in clips
-        ]
+def _encode_cursor(created_at: datetime, clip_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), clip_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, clip_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(clip_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(CLIP_FIELDS)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(CLIP_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    # ``id`` is always returned so clients can address the clips they list.
+    return ["id", *[name for name in CLIP_FIELDS if name in requested and name != "id"]]
+
+
+class _NotModified(Exception):
+    def __init__(self, page: dict) -> None:
+        super().__init__("not modified")
+        self.page = page
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@router.get("", response_model=None)
+async def list_source_clips(
+    project_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+) -> List[dict] | Response:
+    """List a page of source clips ordered by ``(created_at, id)``.
+
+    The next page is requested by passing the ``X-Next-Cursor`` response header
+    back as ``cursor``. ``fields`` is a comma separated subset of the clip
+    fields to return. Pages carry an ``ETag``; a matching ``If-None-Match``
+    is answered with ``304`` from the read-through cache or, on a cache miss,
+    after only a narrow validator query.
+    """
+
+    selected = _parse_fields(fields)
+    conditions = [SourceClip.project_id == project_id]
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        conditions.append(
+            or_(
+                SourceClip.created_at > cursor_created_at,
+                and_(SourceClip.created_at == cursor_created_at, SourceClip.id > cursor_id),
+            )
+        )
+    ordering = (SourceClip.created_at.asc(), SourceClip.id.asc())
+
+    async def load_page() -> dict:
+        async with async_db_session() as session:
+            validator = await session.execute(
+                select(SourceClip.id, SourceClip.created_at, SourceClip.updated_at)
+                .where(*conditions)
+                .order_by(*ordering)
+                .limit(limit + 1)
+            )
+            page_keys = validator.all()
+            if not page_keys:
+                await get_project(session, project_id)
+
+            has_more = len(page_keys) > limit
+            page_keys = page_keys[:limit]
+            digest = hashlib.sha1(",".join(selected).encode())
+            for clip_id, _, updated_at in page_keys:
+                digest.update(f"|{clip_id}:{updated_at.isoformat()}".encode())
+            page = {"etag": f'"{digest.hexdigest()}"', "next_cursor": None, "items": []}
+            if has_more:
+                last_id, last_created_at, _ = page_keys[-1]
+                page["next_cursor"] = _encode_cursor(last_created_at, last_id)
+
+            if _etag_matches(if_none_match, page["etag"]):
+                # Not cached: the page body was never loaded.
+                raise _NotModified(page)
+
+            if page_keys:
+                columns = [getattr(SourceClip, name) for name in selected]
+                page_ids = [clip_id for clip_id, _, _ in page_keys]
+                result = await session.execute(select(*columns).where(SourceClip.id.in_(page_ids)).order_by(*ordering))
+                page["items"] = jsonable_encoder([dict(row._mapping) for row in result])
+            return page
+
+    try:
+        page = await cache.get_or_load(
+            SOURCE_CLIPS, project_id, load_page, params=f"{cursor or ''}|{limit}|{','.join(selected)}"
+        )
+    except _NotModified as not_modified:
+        page = not_modified.page
+
+    headers = {"ETag": page["etag"], "Cache-Control": "private, no-cache"}
+    if page["next_cursor"]:
+        headers["X-Next-Cursor"] = page["next_cursor"]
+    if _etag_matches(if_none_match, page["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return page["items"]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+
+from fastapi import APIRouter, HTTPException, status
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from ..db import async_db_session
+from ..models import Project, SourceClip
+from ..services import render_progress
+from ..workers import dispatch, memory
+
+router = APIRouter(prefix="/projects/{project_id}/renders", tags=["renders"])
+
+MAX_FPS = 120
+
+
+def _get_render(project_id: str, render_id: str) -> dict:
+    progress = render_progress.read_progress(render_id)
+    if progress is None or progress.get("project_id") != project_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Render not found")
+    return progress
+
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def create_render(project_id: str, payload: dict) -> dict:
+    timeline = payload.get("timeline") or []
+    if not isinstance(timeline, list) or not timeline:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="timeline must be a non-empty list")
+    for segment in timeline:
+        if not isinstance(segment, dict) or not segment.get("source_clip_id"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Each timeline segment must reference a source_clip_id",
+            )
+    resolution = payload.get("resolution") or "1080x1920"
+    try:
+        fps = int(payload.get("fps") or 30)
+    except (TypeError, ValueError):
+        fps = 0
+    if not 1 <= fps <= MAX_FPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"fps must be an integer between 1 and {MAX_FPS}"
+        )
+
+    async with async_db_session() as session:
+        project = await session.get(Project, project_id)
+        if project is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        segments_per_clip = Counter(segment["source_clip_id"] for segment in timeline)
+        result = await session.execute(
+            select(SourceClip.id, SourceClip.width, SourceClip.height).where(
+                SourceClip.id.in_(segments_per_clip), SourceClip.project_id == project_id
+            )
+        )
+        sources = {clip_id: (width, height, segments_per_clip[clip_id]) for clip_id, width, height in result}
+
+    missing = segments_per_clip.keys() - sources.keys()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown source clips: {sorted(missing)}"
+        )
+
+    try:
+        estimate = memory.estimate_render(resolution, sources.values())
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="resolution must look like 1080x1920"
+        ) from exc
+
+    render_id = str(uuid.uuid4())
+    await run_in_threadpool(render_progress.write_progress, render_id, project_id=project_id, state="queued")
+    await run_in_threadpool(
+        dispatch.enqueue,
+        dispatch.RENDER_VIDEO,
+        {
+            "render_id": render_id,
+            "project_id": project_id,
+            "timeline": timeline,
+            "resolution": resolution,
+            "fps": fps,
+        },
+        task_id=render_id,
+        **memory.placement(dispatch.RENDER_VIDEO, estimate),
+    )
+
+    return {"render_id": render_id, "project_id": project_id, "state": "queued"}
+
+
+@router.get("/{render_id}")
+def get_render_status(project_id: str, render_id: str) -> dict:
+    return _get_render(project_id, render_id)
+
+
+@router.delete("/{render_id}")
+def cancel_render(project_id: str, render_id: str) -> dict:
+    progress = _get_render(project_id, render_id)
+    if progress.get("state") in render_progress.TERMINAL_STATES:
+        return progress
+
+    dispatch.revoke(render_id)
+    return render_progress.write_progress(render_id, state="cancelled")
@@ -0,0 +1,276 @@
+"""Resumable chunked uploads for audio tracks and source clips.
+
+1. ``POST /uploads`` with ``{"filename", "content_type", "length"}`` creates a
+   session, reserves a staging file and picks the file's final storage path.
+2. ``PATCH /uploads/{id}`` sends the next chunk as the raw request body, with
+   the ``Upload-Offset`` header set to the session's current offset. Chunks are
+   streamed straight into the staging file.
+3. ``HEAD /uploads/{id}`` reports the current ``Upload-Offset`` so an
+   interrupted client knows where to resume.
+4. ``POST /uploads/{id}/complete`` moves the file to its storage path, creates
+   the AudioTrack or SourceClip and enqueues the same processing tasks as the
+   single-request upload endpoints.
+5. ``DELETE /uploads/{id}`` aborts the upload and removes the staging file.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+
+from .. import admission
+from ..cache import SOURCE_CLIPS, cache
+from ..config import settings
+from ..db import async_db_session
+from ..models import AudioTrack, Project, SourceClip
+from ..services import storage, upload_sessions
+from ..workers import dispatch, memory
+
+router = APIRouter(prefix="/projects/{project_id}/uploads", tags=["uploads"])
+
+DEFAULT_EXTENSIONS = {"audio": ".mp3", "video": ".mp4"}
+
+
+def _upload_headers(session: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "Upload-Offset": str(session["offset"]),
+        "Upload-Length": str(session["length"]),
+        "Cache-Control": "no-store",
+    }
+
+
+def _staged_path(upload: Dict[str, Any]) -> str:
+    # Sessions created before staging was introduced wrote in place.
+    return upload.get("staging_path") or upload["storage_path"]
+
+
+async def _get_session(project_id: str, upload_id: str) -> Dict[str, Any]:
+    session = await upload_sessions.read_session(upload_id)
+    if session is None or session["project_id"] != project_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return session
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_upload(project_id: str, payload: dict, response: Response) -> dict:
+    content_type = payload.get("content_type") or ""
+    kind = content_type.split("/")[0]
+    if kind not in DEFAULT_EXTENSIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="content_type must be audio/* or video/*")
+    length = payload.get("length")
+    if not isinstance(length, int) or length <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="length must be a positive integer")
+    if length > settings.upload_max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload is too large")
+
+    async with async_db_session() as session:
+        if await session.get(Project, project_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    upload_id = str(uuid.uuid4())
+    filename = payload.get("filename") or ""
+    extension = "." + filename.split(".")[-1] if "." in filename else DEFAULT_EXTENSIONS[kind]
+    folder = "audio" if kind == "audio" else "videos"
+    await upload_sessions.sweep_stale_uploads()
+    staging_path = await run_in_threadpool(storage.reserve_file, upload_sessions.staging_path(upload_id, extension))
+
+    upload = await upload_sessions.write_session(
+        upload_id,
+        project_id=project_id,
+        kind=kind,
+        content_type=content_type,
+        staging_path=staging_path,
+        storage_path=f"{folder}/{project_id}/{upload_id}{extension}",
+        length=length,
+        offset=0,
+    )
+    response.headers.update(_upload_headers(upload))
+    response.headers["Location"] = f"/api/projects/{project_id}/uploads/{upload_id}"
+    return upload
+
+
+@router.head("/{upload_id}")
+async def upload_offset(project_id: str, upload_id: str) -> Response:
+    upload = await _get_session(project_id, upload_id)
+    return Response(status_code=status.HTTP_200_OK, headers=_upload_headers(upload))
+
+
+@router.get("/{upload_id}")
+async def get_upload(project_id: str, upload_id: str, response: Response) -> dict:
+    upload = await _get_session(project_id, upload_id)
+    response.headers.update(_upload_headers(upload))
+    return upload
+
+
+@router.patch("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def upload_chunk(
+    project_id: str,
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    content_length: Optional[int] = Header(None),
+) -> Response:
+    upload = await _get_session(project_id, upload_id)
+    if upload.get("result") is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already complete")
+    if content_length is None:
+        raise HTTPException(status_code=status.HTTP_411_LENGTH_REQUIRED, detail="Content-Length is required")
+
+    lock = upload_sessions.chunk_lock(upload_id)
+    if not await lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another chunk is being written")
+    try:
+        # Re-read under the lock: a concurrent chunk may have moved the offset.
+        upload = await _get_session(project_id, upload_id)
+        offset = upload["offset"]
+        if upload_offset != offset:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload-Offset must be {offset}",
+                headers=_upload_headers(upload),
+            )
+        if offset + content_length > upload["length"]:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Chunk runs past the upload length"
+            )
+
+        hasher = upload_sessions.hasher_at(upload_id, offset)
+        try:
+            await storage.write_at_async(_staged_path(upload), offset, request.stream(), hasher=hasher)
+        finally:
+            # The stored size is what actually reached disk, even if the client
+            # disconnected mid-chunk; resume from there. A running digest that
+            # no longer matches it is discarded by the next ``hasher_at``.
+            new_offset = await run_in_threadpool(storage.stored_size, _staged_path(upload))
+            upload = await upload_sessions.write_session(upload_id, offset=new_offset)
+    finally:
+        await lock.release()
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_upload_headers(upload))
+
+
+async def _create_audio_track(upload: Dict[str, Any], content_hash: str, ticket: admission.Ticket) -> Dict[str, Any]:
+    audio_id = upload["upload_id"]
+    async with async_db_session() as session:
+        session.add(
+            AudioTrack(
+                id=audio_id,
+                project_id=upload["project_id"],
+                storage_path=upload["storage_path"],
+                content_hash=content_hash,
+            )
+        )
+        await session.commit()
+
+    await run_in_threadpool(
+        dispatch.enqueue,
+        dispatch.ANALYZE_AUDIO,
+        {"audio_track_id": audio_id},
+        **memory.placement(
+            dispatch.ANALYZE_AUDIO,
+            memory.estimate_analysis(None, upload["length"]),
+            ticket.task_options(0),
+        ),
+    )
+    await run_in_threadpool(
+        dispatch.enqueue,
+        dispatch.TRANSCRIBE_LYRICS,
+        {"project_id": upload["project_id"], "audio_track_id": audio_id},
+        **ticket.task_options(1),
+    )
+    return {"audio_track_id": audio_id, "project_id": upload["project_id"], "storage_path": upload["storage_path"]}
+
+
+async def _create_source_clip(upload: Dict[str, Any], ticket: admission.Ticket) -> Dict[str, Any]:
+    clip_id = upload["upload_id"]
+    async with async_db_session() as session:
+        session.add(
+            SourceClip(
+                id=clip_id,
+                project_id=upload["project_id"],
+                origin="upload",
+                original_url=None,
+                storage_path=upload["storage_path"],
+            )
+        )
+        await session.commit()
+
+    await cache.ainvalidate(SOURCE_CLIPS, upload["project_id"])
+    await run_in_threadpool(
+        dispatch.enqueue,
+        dispatch.PROCESS_UPLOADED_VIDEO,
+        {"source_clip_id": clip_id},
+        **ticket.task_options(),
+    )
+    return {
+        "id": clip_id,
+        "project_id": upload["project_id"],
+        "storage_path": upload["storage_path"],
+        "origin": "upload",
+        "status": "processing",
+    }
+
+
+@router.post("/{upload_id}/complete", status_code=status.HTTP_201_CREATED)
+async def complete_upload(project_id: str, upload_id: str) -> dict:
+    lock = upload_sessions.chunk_lock(upload_id)
+    if not await lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A chunk is still being written")
+    try:
+        upload = await _get_session(project_id, upload_id)
+        if upload.get("result") is not None:
+            return upload["result"]
+        if upload["offset"] != upload["length"]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload is incomplete: {upload['offset']} of {upload['length']} bytes received",
+                headers=_upload_headers(upload),
+            )
+
+        staged = _staged_path(upload)
+        content_hash = upload_sessions.final_digest(upload_id, upload["length"])
+        if content_hash is None:
+            content_hash = await run_in_threadpool(storage.hash_file, str(storage.local_path(staged)))
+
+        if upload["kind"] == "audio":
+            ticket = await admission.admit(project_id, dispatch.ANALYZE_AUDIO, cost=2)
+        else:
+            ticket = await admission.admit(project_id, dispatch.PROCESS_UPLOADED_VIDEO)
+        try:
+            if staged != upload["storage_path"]:
+                await run_in_threadpool(storage.move_file, staged, upload["storage_path"])
+            try:
+                if upload["kind"] == "audio":
+                    result = await _create_audio_track(upload, content_hash, ticket)
+                else:
+                    result = await _create_source_clip(upload, ticket)
+            except Exception:
+                # Put the file back so the client can retry the finalize.
+                if staged != upload["storage_path"]:
+                    await run_in_threadpool(storage.move_file, upload["storage_path"], staged)
+                raise
+        except Exception:
+            await admission.release_async(ticket)
+            raise
+        # Keep the result so a retried finalize returns it instead of a duplicate row.
+        await upload_sessions.write_session(upload_id, content_hash=content_hash, result=result)
+    finally:
+        await lock.release()
+    return result
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(project_id: str, upload_id: str) -> Response:
+    lock = upload_sessions.chunk_lock(upload_id)
+    if not await lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A chunk is still being written")
+    try:
+        upload = await _get_session(project_id, upload_id)
+        if upload.get("result") is None:
+            await run_in_threadpool(storage.delete_file, _staged_path(upload))
+        await upload_sessions.delete_session(upload_id)
+    finally:
+        await lock.release()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,19 +1,30 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, List
+from functools import lru_cache
+from types import ModuleType
+from typing import Dict, List, Optional
 
-try:
-    import librosa
-except ImportError:  # pragma: no cover - optional dependency
-    librosa = None
+from .. import instrumentation
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _load_librosa() -> Optional[ModuleType]:
+    # librosa imports numba and scipy, which takes seconds; defer it to the
+    # first analysis instead of paying it in every process that imports us.
+    try:
+        import librosa
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return librosa
+
+
 def analyze_audio(local_path: str) -> Dict[str, object]:
     """Analyze the uploaded audio file for duration, BPM, and beat grid."""
 
+    librosa = _load_librosa()
     if librosa is None:
         logger.warning("librosa not available; returning stubbed audio analysis values")
         return {
@@ -22,8 +33,10 @@ def analyze_audio(local_path: str) -> Dict[str, object]:
             "beat_grid": [i * 0.5 for i in range(16)],
         }
 
-    y, sr = librosa.load(local_path)
-    tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
+    with instrumentation.span("audio.decode"):
+        y, sr = librosa.load(local_path)
+    with instrumentation.span("audio.beat_track"):
+        tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
     beat_times: List[float] = librosa.frames_to_time(beats, sr=sr).tolist()
     duration = librosa.get_duration(y=y, sr=sr)
 
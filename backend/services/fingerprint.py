@@ -0,0 +1,311 @@
+"""Acoustic fingerprints for recognising re-encoded copies of a song.
+
+Implements the Haitsma-Kalker scheme: the audio is resampled to 5512 Hz and
+cut into overlapping frames every ~11.6 ms; for each frame the energy in 33
+logarithmically spaced bands between 300 and 2000 Hz is compared with its
+neighbours in frequency and time, giving one 32-bit sub-fingerprint per
+frame. The bits survive MP3/AAC re-encoding and YouTube rips well, so the
+same song in a different container shares many exact sub-fingerprints.
+
+Every ``INDEX_STRIDE``-th sub-fingerprint of a track is stored in the
+``audio_fingerprint_keys`` table. A lookup lets every query sub-fingerprint
+vote for ``(track, frame offset)`` pairs found under the same key; the best
+candidates are verified by the bit error rate of the whole overlapping
+fingerprint, which also yields the time offset between the two copies.
+
+Only audio analysis (:func:`analyze_or_reuse`, used by the analysis task and
+the bulk backfill) decodes and fingerprints a track; other tasks look up a
+match from the stored fingerprint with :func:`stored_match`.
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+
+from .. import instrumentation
+from ..db import db_session
+from ..models import AudioFingerprint, AudioTrack, FingerprintKey
+from . import audio_analysis
+from .audio_analysis import _load_librosa
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 5512
+FRAME_SIZE = 2048
+HOP_LENGTH = 64
+HOP_SECONDS = HOP_LENGTH / SAMPLE_RATE
+BAND_COUNT = 33
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 2000.0
+BLOCK_FRAMES = 1024
+
+INDEX_STRIDE = 4
+LOOKUP_CHUNK_SIZE = 500
+MAX_CANDIDATES = 5
+MIN_VOTES = 4
+MIN_OVERLAP_FRAMES = 256
+MAX_BIT_ERROR_RATE = 0.35
+
+# Sub-fingerprints of silence or clipping carry no information.
+_UNINFORMATIVE = {0, 0xFFFFFFFF}
+
+
+@dataclass
+class Match:
+    audio_track_id: str
+    # Time in the matched track corresponding to time 0 of the query.
+    offset_seconds: float
+    bit_error_rate: float
+    votes: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _band_matrix() -> "np.ndarray":
+    import numpy as np
+
+    edges = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, BAND_COUNT + 1)
+    bins = np.round(edges * FRAME_SIZE / SAMPLE_RATE).astype(int)
+    matrix = np.zeros((FRAME_SIZE // 2 + 1, BAND_COUNT), dtype=np.float32)
+    for band in range(BAND_COUNT):
+        matrix[bins[band]:max(bins[band + 1], bins[band] + 1), band] = 1.0
+    return matrix
+
+
+def fingerprint_samples(samples: "np.ndarray") -> "np.ndarray":
+    """Return the uint32 sub-fingerprints of mono ``samples`` at :data:`SAMPLE_RATE`."""
+
+    import numpy as np
+
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) < FRAME_SIZE + HOP_LENGTH:
+        return np.zeros(0, dtype=np.uint32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_LENGTH]
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    bands = _band_matrix()
+    energies = np.empty((len(frames), BAND_COUNT), dtype=np.float32)
+    # Transform in blocks so a long song never materialises all frames at once.
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES] * window
+        spectrum = np.abs(np.fft.rfft(block, axis=1)).astype(np.float32) ** 2
+        energies[start:start + len(block)] = spectrum @ bands
+
+    band_deltas = energies[:, :-1] - energies[:, 1:]
+    bits = (band_deltas[1:] - band_deltas[:-1]) > 0
+    weights = np.left_shift(np.uint64(1), np.arange(31, -1, -1, dtype=np.uint64))
+    return (bits.astype(np.uint64) @ weights).astype(np.uint32)
+
+
+def compute_fingerprint(local_path: str) -> Optional[Tuple["np.ndarray", float]]:
+    """Decode ``local_path`` and return its sub-fingerprints and duration in seconds."""
+
+    librosa = _load_librosa()
+    if librosa is None:
+        logger.warning("librosa not available; skipping audio fingerprinting")
+        return None
+    with instrumentation.span("audio.fingerprint_decode"):
+        samples, _ = librosa.load(local_path, sr=SAMPLE_RATE, mono=True)
+    with instrumentation.span("audio.fingerprint"):
+        codes = fingerprint_samples(samples)
+    return codes, len(samples) / SAMPLE_RATE
+
+
+def bit_error_rate(query: "np.ndarray", reference: "np.ndarray", offset_frames: int) -> Optional[float]:
+    """Bit error rate of ``query`` against ``reference`` shifted by ``offset_frames``.
+
+    Query frame ``i`` is compared with reference frame ``i + offset_frames``.
+    Returns ``None`` when the two overlap by fewer than :data:`MIN_OVERLAP_FRAMES`.
+    """
+
+    import numpy as np
+
+    start = max(0, -offset_frames)
+    end = min(len(query), len(reference) - offset_frames)
+    if end - start < MIN_OVERLAP_FRAMES:
+        return None
+    differing = np.bitwise_xor(query[start:end], reference[start + offset_frames:end + offset_frames])
+    errors = int(np.unpackbits(differing.view(np.uint8)).sum())
+    return errors / (32 * (end - start))
+
+
+def _decode_codes(blob: bytes) -> "np.ndarray":
+    import numpy as np
+
+    return np.frombuffer(blob, dtype="<u4")
+
+
+def _as_key(code: int) -> int:
+    # Index codes are stored as signed 32-bit integers.
+    return code - (1 << 32) if code >= 1 << 31 else code
+
+
+def store_fingerprint(audio_track_id: str, codes: "np.ndarray") -> None:
+    """Persist a track's fingerprint and add its sampled sub-fingerprints to the index."""
+
+    rows = [
+        {"code": _as_key(int(codes[position])), "audio_track_id": audio_track_id, "position": position}
+        for position in range(0, len(codes), INDEX_STRIDE)
+        if int(codes[position]) not in _UNINFORMATIVE
+    ]
+    with db_session() as session:
+        session.merge(
+            AudioFingerprint(
+                audio_track_id=audio_track_id,
+                frame_count=len(codes),
+                codes=codes.astype("<u4").tobytes(),
+            )
+        )
+        session.query(FingerprintKey).filter_by(audio_track_id=audio_track_id).delete()
+        if rows:
+            session.execute(insert(FingerprintKey), rows)
+        session.commit()
+
+
+def _vote(codes: "np.ndarray", exclude_track_id: Optional[str]) -> Counter:
+    positions: Dict[int, List[int]] = defaultdict(list)
+    for position, code in enumerate(codes.tolist()):
+        if code not in _UNINFORMATIVE:
+            positions[_as_key(code)].append(position)
+
+    votes: Counter = Counter()
+    keys = list(positions)
+    with db_session() as session:
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            result = session.execute(
+                select(FingerprintKey.code, FingerprintKey.audio_track_id, FingerprintKey.position).where(
+                    FingerprintKey.code.in_(chunk)
+                )
+            )
+            for code, track_id, reference_position in result:
+                if track_id == exclude_track_id:
+                    continue
+                for query_position in positions[code]:
+                    votes[(track_id, reference_position - query_position)] += 1
+    return votes
+
+
+def find_match(codes: "np.ndarray", exclude_track_id: Optional[str] = None) -> Optional[Match]:
+    """Return the indexed track that ``codes`` is a copy of, with its time offset."""
+
+    if len(codes) < MIN_OVERLAP_FRAMES:
+        return None
+    with instrumentation.span("audio.fingerprint_lookup"):
+        votes = _vote(codes, exclude_track_id)
+        candidates = [(candidate, count) for candidate, count in votes.most_common(MAX_CANDIDATES) if count >= MIN_VOTES]
+        if not candidates:
+            return None
+
+        with db_session() as session:
+            stored = dict(
+                session.execute(
+                    select(AudioFingerprint.audio_track_id, AudioFingerprint.codes).where(
+                        AudioFingerprint.audio_track_id.in_({track_id for (track_id, _), _ in candidates})
+                    )
+                ).all()
+            )
+
+        best: Optional[Match] = None
+        for (track_id, offset_frames), count in candidates:
+            if track_id not in stored:
+                continue
+            error_rate = bit_error_rate(codes, _decode_codes(stored[track_id]), offset_frames)
+            if error_rate is None or error_rate > MAX_BIT_ERROR_RATE:
+                continue
+            if best is None or error_rate < best.bit_error_rate:
+                best = Match(track_id, round(offset_frames * HOP_SECONDS, 4), round(error_rate, 4), count)
+    return best
+
+
+def stored_match(content_hash: str) -> Optional[Tuple[Match, float]]:
+    """Match the stored fingerprint of a track with ``content_hash`` against other tracks.
+
+    Returns the match and the track's duration in seconds, or ``None`` when the
+    content has not been fingerprinted yet or no copy of it is indexed.
+    """
+
+    with db_session() as session:
+        row = session.execute(
+            select(AudioFingerprint.audio_track_id, AudioFingerprint.codes)
+            .join(AudioTrack, AudioTrack.id == AudioFingerprint.audio_track_id)
+            .where(AudioTrack.content_hash == content_hash)
+            .limit(1)
+        ).one_or_none()
+    if row is None:
+        return None
+    codes = _decode_codes(row.codes)
+    match = find_match(codes, exclude_track_id=row.audio_track_id)
+    if match is None:
+        return None
+    return match, len(codes) * HOP_SECONDS
+
+
+def is_fingerprinted(content_hash: str) -> bool:
+    """Whether any track with ``content_hash`` has a stored fingerprint."""
+
+    with db_session() as session:
+        return session.execute(
+            select(AudioFingerprint.audio_track_id)
+            .join(AudioTrack, AudioTrack.id == AudioFingerprint.audio_track_id)
+            .where(AudioTrack.content_hash == content_hash)
+            .limit(1)
+        ).first() is not None
+
+
+def shift_timed_items(items: List[Dict[str, Any]], offset_seconds: float, duration: float) -> List[Dict[str, Any]]:
+    """Move timed items from a matched track's timeline onto the query's.
+
+    Items that fall outside ``[0, duration]`` after the shift are dropped.
+    """
+
+    shifted = []
+    for item in items:
+        start = float(item["start"]) - offset_seconds
+        end = float(item["end"]) - offset_seconds
+        if end <= 0 or start >= duration:
+            continue
+        shifted.append({**item, "start": round(max(start, 0.0), 3), "end": round(min(end, duration), 3)})
+    return shifted
+
+
+def reuse_analysis(match: Dict[str, Any], duration: float) -> Optional[Dict[str, object]]:
+    """Return the matched track's analysis shifted onto the query, if it has one."""
+
+    with db_session() as session:
+        row = session.execute(
+            select(AudioTrack.bpm, AudioTrack.beat_grid).where(AudioTrack.id == match["audio_track_id"])
+        ).one_or_none()
+    if row is None or row.bpm is None or row.beat_grid is None:
+        return None
+    offset = match["offset_seconds"]
+    beat_grid = [round(beat - offset, 4) for beat in row.beat_grid if 0.0 <= beat - offset <= duration]
+    return {"duration_seconds": duration, "bpm": row.bpm, "beat_grid": beat_grid}
+
+
+def analyze_or_reuse(audio_track_id: str, local_path: str) -> Dict[str, object]:
+    """Fingerprint and analyze a track, reusing the analysis of an earlier copy of it.
+
+    The fingerprint is stored so later copies, and transcription, can find
+    this track.
+    """
+
+    computed = compute_fingerprint(local_path)
+    if computed is not None:
+        codes, duration = computed
+        match = find_match(codes, exclude_track_id=audio_track_id)
+        store_fingerprint(audio_track_id, codes)
+        if match is not None:
+            reused = reuse_analysis(match.as_dict(), duration)
+            if reused is not None:
+                logger.info("Reusing analysis of %s for %s", match.audio_track_id, audio_track_id)
+                return reused
+    return audio_analysis.analyze_audio(local_path)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ..redis_client import get_redis
+
+BATCH_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def batch_key(batch_id: str) -> str:
+    return f"ingest-batch:{batch_id}"
+
+
+def read_batch_status(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Return the stored status of a bulk URL ingest batch."""
+
+    raw = get_redis().get(batch_key(batch_id))
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+def write_batch_status(batch_id: str, **fields: Any) -> Dict[str, Any]:
+    """Merge ``fields`` into the stored batch status and return it."""
+
+    client = get_redis()
+    key = batch_key(batch_id)
+    raw = client.get(key)
+    status: Dict[str, Any] = json.loads(raw) if raw else {"batch_id": batch_id}
+    status.update(fields)
+    status["updated_at"] = datetime.utcnow().isoformat()
+    client.set(key, json.dumps(status, default=str), ex=BATCH_TTL_SECONDS)
+    return status
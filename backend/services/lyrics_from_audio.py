@@ -7,6 +7,7 @@ from typing import Any, Dict, List, Optional
 
 import requests
 
+from .. import instrumentation
 from ..config import settings
 
 logger = logging.getLogger(__name__)
@@ -45,7 +46,7 @@ class TranscriptionClient:
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
 
-        with file_path.open("rb") as audio_file:
+        with instrumentation.span("transcription.http"), file_path.open("rb") as audio_file:
             files = {"file": (file_path.name, audio_file, "application/octet-stream")}
             data = {"timestamps": "word"}
             response = requests.post(
@@ -3,7 +3,6 @@ from __future__ import annotations
 import json
 import logging
 import os
-import subprocess
 import tempfile
 import uuid
 from datetime import datetime
@@ -11,8 +10,9 @@ from pathlib import Path
 from typing import Dict, List
 
 import requests
-from PIL import Image
+from sqlalchemy import insert
 
+from .. import instrumentation
 from ..db import db_session
 from ..models import Project, SourceClip
 from . import storage
@@ -24,7 +24,8 @@ def resolve_media_urls_from_input(url: str) -> List[str]:
     """Resolve direct media URLs for a given user-provided URL using yt-dlp."""
 
     try:
-        process = subprocess.run(
+        process = instrumentation.run_subprocess(
+            "ingest.resolve",
             [
                 "yt-dlp",
                 "--dump-json",
@@ -60,15 +61,19 @@ def resolve_media_urls_from_input(url: str) -> List[str]:
 def download_media_file(media_url: str) -> str:
     """Download a media file to a temporary local path and return it."""
 
-    response = requests.get(media_url, stream=True, timeout=60)
-    response.raise_for_status()
-
-    suffix = Path(media_url).suffix or ".mp4"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                temp_file.write(chunk)
-        temp_path = temp_file.name
+    with instrumentation.span("ingest.download"):
+        response = requests.get(media_url, stream=True, timeout=60)
+        response.raise_for_status()
+
+        suffix = Path(media_url).suffix or ".mp4"
+        received = 0
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    temp_file.write(chunk)
+                    received += len(chunk)
+            temp_path = temp_file.name
+    instrumentation.record_bytes("ingest.download", received)
     return temp_path
 
 
@@ -87,7 +92,7 @@ def extract_video_metadata(local_path: str) -> Dict[str, float | int | None]:
         "json",
         local_path,
     ]
-    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    result = instrumentation.run_subprocess("ingest.ffprobe", command, capture_output=True, text=True, check=False)
     if result.returncode != 0:
         raise RuntimeError(f"ffprobe failed: {result.stderr}")
 
@@ -114,6 +119,8 @@ def extract_video_metadata(local_path: str) -> Dict[str, float | int | None]:
 def generate_thumbnail(local_video_path: str, time_seconds: float = 0.5) -> bytes:
     """Generate a thumbnail image for a video clip using ffmpeg."""
 
+    from PIL import Image
+
     resized_path: str | None = None
     with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as temp_image:
         temp_image_path = temp_image.name
@@ -131,11 +138,11 @@ def generate_thumbnail(local_video_path: str, time_seconds: float = 0.5) -> byte
             "2",
             temp_image_path,
         ]
-        result = subprocess.run(command, capture_output=True, check=False)
+        result = instrumentation.run_subprocess("ingest.thumbnail", command, capture_output=True, check=False)
         if result.returncode != 0:
             raise RuntimeError(f"ffmpeg thumbnail generation failed: {result.stderr}")
 
-        with Image.open(temp_image_path) as img:
+        with instrumentation.span("ingest.thumbnail_resize"), Image.open(temp_image_path) as img:
             width = 480
             ratio = width / float(img.width)
             resized = img.resize((width, int(img.height * ratio)))
@@ -154,67 +161,86 @@ def generate_thumbnail(local_video_path: str, time_seconds: float = 0.5) -> byte
     return data
 
 
-def ingest_single_media_url(project_id: str, input_url: str, origin: str = "url") -> List[Dict]:
-    """Ingest media from a URL and persist SourceClip entries."""
+def _store_media_file(project_id: str, input_url: str, origin: str, media_url: str) -> Dict:
+    """Download one resolved media URL into storage and return its SourceClip row."""
+
+    local_path = download_media_file(media_url)
+    try:
+        metadata = extract_video_metadata(local_path)
+        thumbnail_bytes = generate_thumbnail(local_path)
+
+        clip_id = str(uuid.uuid4())
+        extension = Path(local_path).suffix or ".mp4"
+        storage_dest = f"videos/{project_id}/{clip_id}{extension}"
+        thumb_dest = f"thumbnails/{project_id}/{clip_id}.jpg"
+
+        with open(local_path, "rb") as infile:
+            storage_path = storage.upload_file(infile, storage_dest)
+        thumbnail_path = storage.upload_bytes(thumbnail_bytes, thumb_dest, content_type="image/jpeg")
+
+        now = datetime.utcnow()
+        return {
+            "id": clip_id,
+            "project_id": project_id,
+            "origin": origin,
+            "original_url": input_url,
+            "storage_path": storage_path,
+            "thumbnail_path": thumbnail_path,
+            "duration_seconds": metadata.get("duration_seconds"),
+            "width": metadata.get("width"),
+            "height": metadata.get("height"),
+            "fps": metadata.get("fps"),
+            "created_at": now,
+            "updated_at": now,
+        }
+    finally:
+        if os.path.exists(local_path):
+            os.remove(local_path)
+
+
+def _public_clip(row: Dict) -> Dict:
+    return {key: value for key, value in row.items() if key not in ("created_at", "updated_at")}
+
 
-    media_urls = resolve_media_urls_from_input(input_url)
-    created_clips: List[Dict] = []
+def ingest_media_urls(
+    project_id: str,
+    input_urls: List[str],
+    origin: str = "url",
+    skip_failures: bool = True,
+) -> Dict[str, List[Dict]]:
+    """Ingest media from several URLs and persist their SourceClips in one bulk insert.
+
+    With ``skip_failures`` a URL that cannot be resolved or downloaded is
+    reported under ``failed`` instead of aborting the rest of the batch.
+    """
 
     with db_session() as session:
         project = session.query(Project).filter_by(id=project_id).one_or_none()
         if project is None:
             raise ValueError(f"Project {project_id} does not exist")
 
-        for media_url in media_urls:
-            local_path = download_media_file(media_url)
-            try:
-                metadata = extract_video_metadata(local_path)
-                thumbnail_bytes = generate_thumbnail(local_path)
-
-                clip_id = str(uuid.uuid4())
-                extension = Path(local_path).suffix or ".mp4"
-                storage_dest = f"videos/{project_id}/{clip_id}{extension}"
-                thumb_dest = f"thumbnails/{project_id}/{clip_id}.jpg"
-
-                with open(local_path, "rb") as infile:
-                    storage_path = storage.upload_file(infile, storage_dest)
-                thumbnail_path = storage.upload_bytes(thumbnail_bytes, thumb_dest, content_type="image/jpeg")
-
-                now = datetime.utcnow()
-                clip = SourceClip(
-                    id=clip_id,
-                    project_id=project_id,
-                    origin=origin,
-                    original_url=input_url,
-                    storage_path=storage_path,
-                    thumbnail_path=thumbnail_path,
-                    duration_seconds=metadata.get("duration_seconds"),
-                    width=metadata.get("width"),
-                    height=metadata.get("height"),
-                    fps=metadata.get("fps"),
-                    created_at=now,
-                    updated_at=now,
-                )
-                session.add(clip)
-                session.flush()
-
-                created_clips.append(
-                    {
-                        "id": clip.id,
-                        "project_id": clip.project_id,
-                        "storage_path": clip.storage_path,
-                        "thumbnail_path": clip.thumbnail_path,
-                        "duration_seconds": clip.duration_seconds,
-                        "width": clip.width,
-                        "height": clip.height,
-                        "fps": clip.fps,
-                        "origin": clip.origin,
-                        "original_url": clip.original_url,
-                    }
-                )
-            finally:
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-        session.commit()
-
-    return created_clips
+    rows: List[Dict] = []
+    failed: List[Dict] = []
+    for input_url in input_urls:
+        try:
+            for media_url in resolve_media_urls_from_input(input_url):
+                rows.append(_store_media_file(project_id, input_url, origin, media_url))
+        except Exception as exc:
+            if not skip_failures:
+                raise
+            logger.warning("Failed to ingest %s: %s", input_url, exc)
+            failed.append({"url": input_url, "error": str(exc)})
+
+    if rows:
+        with db_session() as session:
+            session.execute(insert(SourceClip), rows)
+            session.commit()
+
+    return {"clips": [_public_clip(row) for row in rows], "failed": failed}
+
+
+def ingest_single_media_url(project_id: str, input_url: str, origin: str = "url") -> List[Dict]:
+    """Ingest media from a URL and persist SourceClip entries."""
+
+    result = ingest_media_urls(project_id, [input_url], origin=origin, skip_failures=False)
+    return result["clips"]
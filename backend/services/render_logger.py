@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from proglog import ProgressBarLogger
+
+from .render_progress import write_progress
+from .rendering import StageTimings
+
+PUBLISH_INTERVAL_SECONDS = 0.5
+
+
+class RedisProgressLogger(ProgressBarLogger):
+    """proglog logger that publishes MoviePy's frame progress to Redis.
+
+    MoviePy reports encoded frames through the ``t`` bar of
+    ``write_videofile``. Each update is turned into frames encoded, encode fps,
+    ETA and the current per-stage timings, throttled to one Redis write every
+    :data:`PUBLISH_INTERVAL_SECONDS`. Renders that encode several parts (see
+    the stream-copy path of :func:`~.rendering.render_video`) restart the bar
+    for each part, so frame counts are accumulated across parts; that path
+    also sends the render's ``total_frames`` and the ``frames_copied`` by each
+    stream-copied segment, which count towards progress without encoding.
+    """
+
+    def __init__(self, render_id: str, timings: StageTimings) -> None:
+        super().__init__()
+        self.render_id = render_id
+        self.timings = timings
+        self._started = time.monotonic()
+        self._last_publish = 0.0
+        self._frame_base = 0
+        self._last_index = -1
+        self._total_frames: Optional[int] = None
+
+    def callback(self, **changes: Any) -> None:
+        if "total_frames" in changes:
+            self._total_frames = int(changes["total_frames"])
+        if "frames_copied" in changes:
+            self._frame_base += int(changes["frames_copied"])
+            self._publish(time.monotonic(), self._frame_base + self._last_index + 1, self._total_frames)
+
+    def bars_callback(self, bar: str, attr: str, value: Any, old_value: Any = None) -> None:
+        if bar != "t" or attr != "index":
+            return
+
+        if value < self._last_index:
+            self._frame_base += self._last_index + 1
+        self._last_index = int(value)
+
+        now = time.monotonic()
+        part_total = self.bars[bar].get("total")
+        finished = part_total is not None and value + 1 >= part_total
+        if not finished and now - self._last_publish < PUBLISH_INTERVAL_SECONDS:
+            return
+
+        total = self._total_frames
+        if total is None and part_total is not None:
+            total = self._frame_base + part_total
+        self._publish(now, self._frame_base + int(value) + 1, total)
+
+    def _publish(self, now: float, frames_encoded: int, total: Optional[int]) -> None:
+        self._last_publish = now
+        elapsed = now - self._started
+        encode_fps = frames_encoded / elapsed if elapsed > 0 else 0.0
+        eta_seconds = None
+        if total and encode_fps > 0:
+            eta_seconds = round(max(total - frames_encoded, 0) / encode_fps, 1)
+
+        write_progress(
+            self.render_id,
+            state="encoding",
+            frames_encoded=frames_encoded,
+            total_frames=total,
+            encode_fps=round(encode_fps, 2),
+            eta_seconds=eta_seconds,
+            elapsed_seconds=round(elapsed, 1),
+            stage_seconds=self.timings.as_dict(),
+        )
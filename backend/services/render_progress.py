@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+
+from ..events import RENDER_PROGRESS, publish_event
+from ..redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TTL_SECONDS = 24 * 60 * 60
+TERMINAL_STATES = frozenset({"completed", "failed", "cancelled"})
+
+
+def progress_key(render_id: str) -> str:
+    return f"render:{render_id}:progress"
+
+
+def read_progress(render_id: str) -> Optional[Dict[str, Any]]:
+    """Return the last published progress snapshot for a render job."""
+
+    raw = get_redis().get(progress_key(render_id))
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+def write_progress(render_id: str, **fields: Any) -> Dict[str, Any]:
+    """Merge ``fields`` into the stored progress snapshot and return it.
+
+    The merge runs in a ``WATCH`` transaction so concurrent writers (the
+    worker's progress logger and a cancel request) cannot lose each other's
+    updates. Once a render reached a terminal state its snapshot is final:
+    later writes are dropped and the stored snapshot is returned unchanged.
+    Written snapshots are also published as ``render.progress`` project events.
+    """
+
+    key = progress_key(render_id)
+
+    def merge(pipe: redis.client.Pipeline) -> Tuple[Dict[str, Any], bool]:
+        raw = pipe.get(key)
+        snapshot: Dict[str, Any] = json.loads(raw) if raw else {"render_id": render_id}
+        if snapshot.get("state") in TERMINAL_STATES:
+            return snapshot, False
+        snapshot.update(fields)
+        snapshot["updated_at"] = datetime.utcnow().isoformat()
+        pipe.multi()
+        pipe.set(key, json.dumps(snapshot), ex=PROGRESS_TTL_SECONDS)
+        return snapshot, True
+
+    snapshot, written = get_redis().transaction(merge, key, value_from_callable=True)
+    if written and snapshot.get("project_id"):
+        publish_event(snapshot["project_id"], RENDER_PROGRESS, snapshot)
+    return snapshot
@@ -1,12 +1,41 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Dict, List
+import math
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
-import moviepy.editor as mpe
+from .. import instrumentation
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import moviepy.editor as mpe
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_DECODERS_PER_SOURCE = 2
+OUTPUT_VIDEO_CODEC = "h264"
+OUTPUT_PIXEL_FORMAT = "yuv420p"
+# ffprobe profile names and the libx264 profile that reproduces them.
+X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+_SQUARE_PIXELS = {None, "1:1", "0:1", "N/A"}
+_PROGRESSIVE = {None, "progressive", "unknown"}
+
+
+@lru_cache(maxsize=None)
+def _moviepy() -> ModuleType:
+    # moviepy.editor pulls in numpy, imageio and ffmpeg discovery; import it on
+    # first render rather than whenever this module is imported.
+    import moviepy.editor
+
+    return moviepy.editor
+
 
 def _parse_resolution(resolution: str) -> tuple[int, int]:
     try:
@@ -16,6 +45,420 @@ def _parse_resolution(resolution: str) -> tuple[int, int]:
         raise ValueError(f"Invalid resolution format: {resolution}") from exc
 
 
+@dataclass
+class StageTimings:
+    """Cumulative wall time spent in each render stage, in seconds.
+
+    ``decode`` covers reading source frames, ``composite`` covers resizing and
+    overlaying lyrics on top of the decoded frames, and ``encode`` is the rest
+    of the time spent writing the output (piping frames to ffmpeg and muxing
+    audio).
+    """
+
+    decode: float = 0.0
+    composite: float = 0.0
+    encode: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(value, 3) for name, value in asdict(self).items()}
+
+
+def _timed_frames(make_frame: Callable[[float], Any], add: Callable[[float], None]) -> Callable[[float], Any]:
+    def timed(t: float) -> Any:
+        started = time.perf_counter()
+        try:
+            return make_frame(t)
+        finally:
+            add(time.perf_counter() - started)
+
+    return timed
+
+
+@dataclass
+class _Decoder:
+    clip: mpe.VideoFileClip
+    cursor: float = 0.0
+
+
+@dataclass
+class DecoderPool:
+    """Bounded pool of ``VideoFileClip`` decoders shared across timeline segments.
+
+    Each decoder owns one ffmpeg reader process. Segments cut from the same
+    source are served by subclipping an already open decoder instead of spawning
+    a new reader. Within a source, a segment is assigned to the decoder whose
+    read position is closest behind the segment start so that the reader only
+    ever seeks forward (cheap frame skipping) rather than restarting ffmpeg.
+    """
+
+    max_decoders_per_source: int = DEFAULT_MAX_DECODERS_PER_SOURCE
+    timings: StageTimings = field(default_factory=StageTimings)
+    _decoders: Dict[str, List[_Decoder]] = field(default_factory=dict)
+    decoders_opened: int = 0
+    segments_served: int = 0
+
+    def acquire(self, clip_path: str, video_start: float, video_end: Optional[float]) -> mpe.VideoClip:
+        """Return a subclip of ``clip_path`` backed by a pooled decoder."""
+
+        decoders = self._decoders.setdefault(clip_path, [])
+        decoder = self._select(decoders, video_start)
+        if decoder is None:
+            decoder = _Decoder(clip=_moviepy().VideoFileClip(clip_path, audio=False))
+            # Subclips call back into the parent's make_frame, so timing it here
+            # accounts for every frame decoded on behalf of any segment.
+            decoder.clip.make_frame = _timed_frames(decoder.clip.make_frame, self._add_decode_time)
+            decoders.append(decoder)
+            self.decoders_opened += 1
+
+        end = video_end if video_end is not None else decoder.clip.duration
+        decoder.cursor = end
+        self.segments_served += 1
+        return decoder.clip.subclip(video_start, end)
+
+    def _select(self, decoders: List[_Decoder], video_start: float) -> Optional[_Decoder]:
+        forward = [decoder for decoder in decoders if decoder.cursor <= video_start]
+        if forward:
+            return max(forward, key=lambda decoder: decoder.cursor)
+        if len(decoders) < max(self.max_decoders_per_source, 1):
+            return None
+        return min(decoders, key=lambda decoder: abs(decoder.cursor - video_start))
+
+    def _add_decode_time(self, seconds: float) -> None:
+        self.timings.decode += seconds
+
+    @property
+    def open_decoders(self) -> int:
+        return sum(len(decoders) for decoders in self._decoders.values())
+
+    def close(self) -> None:
+        # Subclips share the reader of their parent clip, so only the pooled
+        # parents are closed here.
+        for decoders in self._decoders.values():
+            for decoder in decoders:
+                decoder.clip.close()
+        self._decoders.clear()
+
+
+@dataclass
+class StreamProfile:
+    codec: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    fps: Optional[float]
+    pix_fmt: Optional[str]
+    duration: Optional[float]
+    profile: Optional[str] = None
+    level: Optional[int] = None
+    time_base: Optional[str] = None
+    sample_aspect_ratio: Optional[str] = None
+    field_order: Optional[str] = None
+
+    def matches(self, width: int, height: int, fps: int) -> bool:
+        """Whether the stream can be copied into a ``width`` x ``height`` @ ``fps`` output.
+
+        Besides codec, size, rate and pixel format, the stream must be
+        progressive with square pixels and use an H.264 profile libx264 can
+        reproduce, so transcoded parts can be encoded to match it.
+        """
+
+        return (
+            self.codec == OUTPUT_VIDEO_CODEC
+            and self.pix_fmt == OUTPUT_PIXEL_FORMAT
+            and self.width == width
+            and self.height == height
+            and self.fps is not None
+            and abs(self.fps - fps) < 0.01
+            and self.profile in X264_PROFILES
+            and self.level is not None
+            and self.sample_aspect_ratio in _SQUARE_PIXELS
+            and self.field_order in _PROGRESSIVE
+        )
+
+    @property
+    def copy_key(self) -> tuple:
+        """Parameters every stream-copied segment of one render must share."""
+
+        return (self.profile, self.level, self.time_base)
+
+    def encoder_params(self) -> List[str]:
+        """libx264 options producing parts that concatenate with this stream."""
+
+        params = ["-profile:v", X264_PROFILES[self.profile], "-vf", "setsar=1"]
+        if self.level:
+            params += ["-level", f"{self.level / 10:.1f}"]
+        return params
+
+
+@dataclass
+class SegmentPlan:
+    """How a single timeline segment will be produced.
+
+    ``mode`` is ``"copy"`` when the segment can be cut from its source without
+    re-encoding, otherwise ``"transcode"``. ``video_start`` may differ from the
+    requested start when it was snapped onto a keyframe.
+    """
+
+    segment: Dict
+    mode: str
+    video_start: float
+    video_end: float
+    output_start: float
+    duration: float
+    profile: StreamProfile
+
+
+def _run_ffprobe(args: List[str]) -> Dict[str, Any]:
+    result = instrumentation.run_subprocess(
+        "render.ffprobe", ["ffprobe", "-v", "error", *args, "-of", "json"], capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr}")
+    return json.loads(result.stdout or "{}")
+
+
+def probe_stream_profile(path: str) -> StreamProfile:
+    """Return codec parameters, dimensions, frame rate and pixel format of the first video stream."""
+
+    payload = _run_ffprobe(
+        [
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=codec_name,profile,level,width,height,r_frame_rate,time_base,sample_aspect_ratio,"
+            "field_order,pix_fmt:format=duration",
+            path,
+        ]
+    )
+    stream = (payload.get("streams") or [{}])[0]
+    duration = (payload.get("format") or {}).get("duration")
+    try:
+        num, den = str(stream.get("r_frame_rate", "0/1")).split("/")
+        fps = float(num) / float(den) if float(den) else None
+    except (ValueError, ZeroDivisionError):
+        fps = None
+    return StreamProfile(
+        codec=stream.get("codec_name"),
+        width=stream.get("width"),
+        height=stream.get("height"),
+        fps=fps,
+        pix_fmt=stream.get("pix_fmt"),
+        duration=float(duration) if duration else None,
+        profile=stream.get("profile"),
+        level=stream.get("level") if isinstance(stream.get("level"), int) and stream["level"] > 0 else None,
+        time_base=stream.get("time_base"),
+        sample_aspect_ratio=stream.get("sample_aspect_ratio"),
+        field_order=stream.get("field_order"),
+    )
+
+
+def probe_keyframes(path: str) -> List[float]:
+    """Return keyframe timestamps of the first video stream.
+
+    Only packet headers are read, so this does not decode the video.
+    """
+
+    payload = _run_ffprobe(["-select_streams", "v:0", "-show_entries", "packet=pts_time,flags", path])
+    keyframes = [
+        float(packet["pts_time"])
+        for packet in payload.get("packets") or []
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+    ]
+    return sorted(keyframes)
+
+
+def _lines_overlap(lines: List[Dict], start: float, end: float) -> bool:
+    for line in lines:
+        if not str(line.get("text", "")).strip():
+            continue
+        if float(line["start"]) < end and float(line["end"]) > start:
+            return True
+    return False
+
+
+def plan_segments(
+    timeline: List[Dict],
+    lyrics_timed_lines: List[Dict],
+    width: int,
+    height: int,
+    fps: int,
+    keyframe_tolerance: float = 0.0,
+) -> List[SegmentPlan]:
+    """Decide per segment whether it can be stream-copied or must be transcoded.
+
+    A segment is copied when its source already matches the output profile, no
+    lyric line is drawn over it, and its start lands on a keyframe or can be
+    moved onto one by at most ``keyframe_tolerance`` seconds. All copied
+    segments must share one H.264 profile, level and time base; when sources
+    differ, the parameters covering the most copyable footage win and the
+    other segments are transcoded. Sources are probed once each.
+    """
+
+    profiles: Dict[str, StreamProfile] = {}
+    keyframes: Dict[str, List[float]] = {}
+    plans: List[SegmentPlan] = []
+    output_position = 0.0
+
+    for segment in timeline:
+        clip_path = segment["clip_path"]
+        if clip_path not in profiles:
+            profiles[clip_path] = probe_stream_profile(clip_path)
+        profile = profiles[clip_path]
+
+        video_start = float(segment.get("video_start", 0.0))
+        video_end = float(segment.get("video_end")) if segment.get("video_end") is not None else None
+        source_end = video_end if video_end is not None else profile.duration
+        if source_end is None:
+            raise ValueError(f"Cannot determine duration of {clip_path}")
+        duration = max(source_end - video_start, 0.0)
+
+        mode = "transcode"
+        start = video_start
+        if profile.matches(width, height, fps) and not _lines_overlap(
+            lyrics_timed_lines, output_position, output_position + duration
+        ):
+            if clip_path not in keyframes:
+                keyframes[clip_path] = probe_keyframes(clip_path)
+            nearest = min(keyframes[clip_path], key=lambda kf: abs(kf - video_start), default=None)
+            fits = nearest is not None and (profile.duration is None or nearest + duration <= profile.duration)
+            if fits and abs(nearest - video_start) <= keyframe_tolerance:
+                mode = "copy"
+                start = nearest
+
+        plans.append(
+            SegmentPlan(
+                segment=segment,
+                mode=mode,
+                video_start=start,
+                video_end=start + duration,
+                output_start=output_position,
+                duration=duration,
+                profile=profile,
+            )
+        )
+        output_position += duration
+
+    copied_seconds: Dict[tuple, float] = {}
+    for plan in plans:
+        if plan.mode == "copy":
+            copied_seconds[plan.profile.copy_key] = copied_seconds.get(plan.profile.copy_key, 0.0) + plan.duration
+    if len(copied_seconds) > 1:
+        chosen = max(copied_seconds, key=copied_seconds.__getitem__)
+        for plan in plans:
+            if plan.mode == "copy" and plan.profile.copy_key != chosen:
+                plan.mode = "transcode"
+                plan.video_start = float(plan.segment.get("video_start", 0.0))
+                plan.video_end = plan.video_start + plan.duration
+
+    return plans
+
+
+def _text_clips(lines: List[Dict], width: int, height: int, offset: float = 0.0, window: Optional[float] = None) -> List[mpe.VideoClip]:
+    mpe = _moviepy()
+    text_clips: List[mpe.VideoClip] = []
+    for line in lines:
+        text = line.get("text", "").strip()
+        if not text:
+            continue
+        start = float(line["start"]) - offset
+        end = float(line["end"]) - offset
+        if window is not None:
+            if end <= 0 or start >= window:
+                continue
+            start, end = max(start, 0.0), min(end, window)
+        duration = max(end - start, 0.1)
+        text_clip = (
+            mpe.TextClip(
+                txt=text,
+                fontsize=60,
+                color="white",
+                stroke_color="black",
+                stroke_width=2,
+                method="caption",
+                size=(width - 200, None),
+            )
+            .set_duration(duration)
+            .set_start(start)
+            .set_position(("center", height - 150))
+        )
+        text_clips.append(text_clip)
+    return text_clips
+
+
+def _frame_count(duration: float, fps: int) -> int:
+    return math.ceil(round(duration * fps, 6))
+
+
+def _notify(progress_logger: Any, **state: Any) -> None:
+    # proglog loggers take arbitrary state through __call__; "bar" and None
+    # are resolved by MoviePy and have nothing to receive it.
+    if callable(progress_logger):
+        progress_logger(**state)
+
+
+def _stream_copy(plan: SegmentPlan, output_path: str) -> None:
+    # Parts are MPEG-TS so every one carries its own SPS/PPS in band.
+    command = [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        f"{plan.video_start:.6f}",
+        "-i",
+        plan.segment["clip_path"],
+        "-t",
+        f"{plan.duration:.6f}",
+        "-map",
+        "0:v:0",
+        "-c",
+        "copy",
+        "-an",
+        "-avoid_negative_ts",
+        "make_zero",
+        "-bsf:v",
+        "h264_mp4toannexb",
+        "-f",
+        "mpegts",
+        output_path,
+    ]
+    result = instrumentation.run_subprocess("render.stream_copy", command, capture_output=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg stream copy failed: {result.stderr}")
+
+
+def _concat_with_audio(
+    parts: List[str], audio_path: str, output_path: str, work_dir: str, profile: StreamProfile
+) -> None:
+    list_path = os.path.join(work_dir, "parts.txt")
+    with open(list_path, "w") as list_file:
+        for part in parts:
+            list_file.write(f"file '{part}'\n")
+    command = [
+        "ffmpeg",
+        "-y",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        list_path,
+        "-i",
+        audio_path,
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c:v",
+        "copy",
+        "-c:a",
+        "aac",
+        *(["-video_track_timescale", profile.time_base.split("/")[1]] if profile.time_base else []),
+        "-shortest",
+        output_path,
+    ]
+    result = instrumentation.run_subprocess("render.concat", command, capture_output=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg concat failed: {result.stderr}")
+
+
 def render_video(
     audio_path: str,
     timeline: List[Dict],
@@ -23,12 +466,162 @@ def render_video(
     output_path: str,
     resolution: str = "1080x1920",
     fps: int = 30,
-) -> None:
-    """Render the final video composition with lyrics overlays."""
+    max_decoders_per_source: int = DEFAULT_MAX_DECODERS_PER_SOURCE,
+    timings: Optional[StageTimings] = None,
+    progress_logger: Any = "bar",
+    stream_copy: bool = True,
+    keyframe_tolerance: float = 0.0,
+) -> Dict[str, object]:
+    """Render the final video composition with lyrics overlays.
+
+    ``timings`` is updated in place while the render runs so callers can report
+    per-stage progress, and ``progress_logger`` is handed to MoviePy's
+    ``write_videofile`` (any proglog logger, ``"bar"`` or ``None``).
+
+    When ``stream_copy`` is enabled, segments that already match the output
+    profile are cut without re-encoding (see :func:`plan_segments`); the
+    remaining runs of segments are transcoded to parts encoded with the copied
+    segments' H.264 profile and level, and everything is joined with ffmpeg's
+    concat demuxer. On that path a proglog ``progress_logger`` also receives
+    ``total_frames`` for the whole render and ``frames_copied`` after each
+    stream-copied segment, since only transcoded parts drive MoviePy's bar.
+
+    Returns a report with the number of segments, how many were stream-copied
+    or transcoded, decoder processes opened, per-stage timings and the peak
+    resident memory of the render process and its ffmpeg children, sampled
+    while this render ran.
+    """
 
     width, height = _parse_resolution(resolution)
+    if not timeline:
+        raise ValueError("Timeline is empty; cannot render video")
+    timings = timings if timings is not None else StageTimings()
+    pool = DecoderPool(max_decoders_per_source=max_decoders_per_source, timings=timings)
+
+    if stream_copy:
+        plans = plan_segments(timeline, lyrics_timed_lines, width, height, fps, keyframe_tolerance)
+    else:
+        plans = []
+    copied = sum(1 for plan in plans if plan.mode == "copy")
+
+    sampler = instrumentation.PeakRss(name="render-rss")
+    sampler.start()
+    try:
+        if copied:
+            _render_segmented(plans, audio_path, lyrics_timed_lines, output_path, width, height, fps, pool, progress_logger)
+        else:
+            _render_composition(
+                timeline, audio_path, lyrics_timed_lines, output_path, width, height, fps, pool, progress_logger
+            )
+    finally:
+        pool.close()
+        peak_rss = sampler.stop()
+
+    report: Dict[str, object] = {
+        "segments": len(timeline),
+        "stream_copied_segments": copied,
+        "transcoded_segments": len(timeline) - copied,
+        "source_files": len({segment["clip_path"] for segment in timeline}),
+        "decoder_processes": pool.decoders_opened,
+        "stage_seconds": timings.as_dict(),
+        "peak_rss_bytes": peak_rss,
+    }
+    for stage, seconds in timings.as_dict().items():
+        instrumentation.STAGE_SECONDS.labels(f"render.{stage}").observe(seconds)
+    logger.info("Render finished: %s", report)
+    return report
+
+
+def _render_segmented(
+    plans: List[SegmentPlan],
+    audio_path: str,
+    lyrics_timed_lines: List[Dict],
+    output_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    pool: DecoderPool,
+    progress_logger: Any,
+) -> None:
+    work_dir = tempfile.mkdtemp(prefix="beatmatchr-render-")
+    profile = next(plan.profile for plan in plans if plan.mode == "copy")
+    _notify(progress_logger, total_frames=sum(_frame_count(plan.duration, fps) for plan in plans))
+    try:
+        parts: List[str] = []
+        run: List[SegmentPlan] = []
+
+        def flush_run() -> None:
+            if not run:
+                return
+            part_path = os.path.join(work_dir, f"part{len(parts):04d}.ts")
+            _render_composition(
+                [plan.segment for plan in run],
+                None,
+                lyrics_timed_lines,
+                part_path,
+                width,
+                height,
+                fps,
+                pool,
+                progress_logger,
+                text_offset=run[0].output_start,
+                text_window=sum(plan.duration for plan in run),
+                encoder_params=profile.encoder_params(),
+            )
+            parts.append(part_path)
+            run.clear()
+
+        for plan in plans:
+            if plan.mode == "transcode":
+                run.append(plan)
+                continue
+            flush_run()
+            part_path = os.path.join(work_dir, f"part{len(parts):04d}.ts")
+            _stream_copy(plan, part_path)
+            parts.append(part_path)
+            _notify(progress_logger, frames_copied=_frame_count(plan.duration, fps))
+        flush_run()
+
+        encode_started = time.perf_counter()
+        _concat_with_audio(parts, audio_path, output_path, work_dir, profile)
+        pool.timings.encode += time.perf_counter() - encode_started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _render_composition(
+    timeline: List[Dict],
+    audio_path: Optional[str],
+    lyrics_timed_lines: List[Dict],
+    output_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    pool: DecoderPool,
+    progress_logger: Any,
+    text_offset: float = 0.0,
+    text_window: Optional[float] = None,
+    encoder_params: Optional[List[str]] = None,
+) -> None:
+    """Decode, resize, overlay and encode ``timeline`` into ``output_path``.
+
+    Without ``audio_path`` the output is a video-only part encoded with the
+    output profile and ``encoder_params`` so it can be concatenated with
+    stream-copied segments.
+    """
+
+    mpe = _moviepy()
+    timings = pool.timings
+    decode_before = timings.decode
+    composite_before = timings.composite
+    composite_seconds = 0.0
     video_segments: List[mpe.VideoClip] = []
 
+    def add_composite_time(seconds: float) -> None:
+        nonlocal composite_seconds
+        composite_seconds += seconds
+        timings.composite = composite_before + max(composite_seconds - (timings.decode - decode_before), 0.0)
+
     try:
         for segment in timeline:
             clip_path = segment["clip_path"]
@@ -36,56 +629,31 @@ def render_video(
             video_end = float(segment.get("video_end")) if segment.get("video_end") is not None else None
             song_start = float(segment.get("song_start", 0.0))
 
-            clip = mpe.VideoFileClip(clip_path)
-            if video_end is not None:
-                clip = clip.subclip(video_start, video_end)
-            else:
-                clip = clip.subclip(video_start)
+            clip = pool.acquire(clip_path, video_start, video_end)
             clip = clip.resize(newsize=(width, height)).set_start(song_start)
             video_segments.append(clip)
 
-        if not video_segments:
-            raise ValueError("Timeline is empty; cannot render video")
-
         base_video = mpe.concatenate_videoclips(video_segments, method="compose")
-
-        text_clips: List[mpe.VideoClip] = []
-        for line in lyrics_timed_lines:
-            text = line.get("text", "").strip()
-            if not text:
-                continue
-            start = float(line["start"])
-            end = float(line["end"])
-            duration = max(end - start, 0.1)
-            text_clip = (
-                mpe.TextClip(
-                    txt=text,
-                    fontsize=60,
-                    color="white",
-                    stroke_color="black",
-                    stroke_width=2,
-                    method="caption",
-                    size=(width - 200, None),
-                )
-                .set_duration(duration)
-                .set_start(start)
-                .set_position(("center", height - 150))
-            )
-            text_clips.append(text_clip)
+        text_clips = _text_clips(lyrics_timed_lines, width, height, offset=text_offset, window=text_window)
 
         composite = mpe.CompositeVideoClip([base_video, *text_clips], size=(width, height))
-        audio_clip = mpe.AudioFileClip(audio_path)
-        composite = composite.set_audio(audio_clip)
+        composite.make_frame = _timed_frames(composite.make_frame, add_composite_time)
+        if audio_path is not None:
+            audio_clip = mpe.AudioFileClip(audio_path)
+            composite = composite.set_audio(audio_clip)
+        write_started = time.perf_counter()
         composite.write_videofile(
             output_path,
             codec="libx264",
+            audio=audio_path is not None,
             audio_codec="aac",
             fps=fps,
             preset="medium",
+            ffmpeg_params=["-pix_fmt", OUTPUT_PIXEL_FORMAT, *(encoder_params or [])],
+            logger=progress_logger,
         )
+        timings.encode += max(time.perf_counter() - write_started - composite_seconds, 0.0)
     finally:
-        for clip in video_segments:
-            clip.close()
         if "base_video" in locals():
             base_video.close()  # type: ignore[union-attr]
         if "text_clips" in locals():
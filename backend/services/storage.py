@@ -1,12 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import shutil
 import tempfile
+import time
 from pathlib import Path
-from typing import BinaryIO
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, List, Optional, Protocol
 
+import aiofiles
+
+from .. import instrumentation
 from ..config import settings
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class AsyncReader(Protocol):
+    def read(self, size: int = -1) -> Awaitable[bytes]:
+        ...
+
 
 def _resolve_destination(dest_path: str) -> Path:
     base_path = Path(settings.storage_base_path)
@@ -15,21 +28,148 @@ def _resolve_destination(dest_path: str) -> Path:
     return full_path
 
 
+def local_path(path: str) -> Path:
+    """Return the local filesystem path of a stored file."""
+
+    return Path(settings.storage_base_path) / path
+
+
+def stored_file(path: str) -> Path:
+    """Return the local path of an existing stored file.
+
+    Raises ``FileNotFoundError`` for missing files and for paths that resolve
+    outside the storage directory.
+    """
+
+    base_path = Path(settings.storage_base_path).resolve()
+    candidate = (base_path / path).resolve()
+    if not candidate.is_relative_to(base_path) or not candidate.is_file():
+        raise FileNotFoundError(f"Storage path does not exist: {path}")
+    return candidate
+
+
 def upload_file(file_obj: BinaryIO, dest_path: str) -> str:
     """Upload a file-like object to object storage."""
 
     destination = _resolve_destination(dest_path)
-    with open(destination, "wb") as out_file:
+    with instrumentation.span("storage.upload"), open(destination, "wb") as out_file:
         shutil.copyfileobj(file_obj, out_file)
+        instrumentation.record_bytes("storage.upload", out_file.tell())
+    return dest_path
+
+
+async def upload_file_async(
+    file_obj: AsyncReader,
+    dest_path: str,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    hasher: Optional[Any] = None,
+) -> str:
+    """Stream an async file-like object (e.g. ``UploadFile``) to object storage.
+
+    Reads and writes happen off the event loop in ``chunk_size`` pieces, so a
+    large upload neither blocks other requests nor is held in memory at once.
+    When a ``hashlib`` object is given it is fed every chunk on the way.
+    """
+
+    destination = await asyncio.to_thread(_resolve_destination, dest_path)
+    written = 0
+    with instrumentation.span("storage.upload"):
+        async with aiofiles.open(destination, "wb") as out_file:
+            while True:
+                chunk = await file_obj.read(chunk_size)
+                if not chunk:
+                    break
+                if hasher is not None:
+                    hasher.update(chunk)
+                await out_file.write(chunk)
+                written += len(chunk)
+    instrumentation.record_bytes("storage.upload", written)
+    return dest_path
+
+
+def reserve_file(dest_path: str) -> str:
+    """Create an empty stored file for a resumable upload to fill in."""
+
+    destination = _resolve_destination(dest_path)
+    destination.write_bytes(b"")
     return dest_path
 
 
+async def write_at_async(
+    dest_path: str,
+    offset: int,
+    chunks: AsyncIterator[bytes],
+    hasher: Optional[Any] = None,
+) -> int:
+    """Write ``chunks`` into a reserved stored file starting at ``offset``.
+
+    Anything past ``offset`` is truncated first, so after a failed write the
+    stored size is exactly the number of bytes that made it to disk. Returns
+    the number of bytes written; ``hasher`` is fed each chunk after it is
+    written.
+    """
+
+    destination = local_path(dest_path)
+    written = 0
+    with instrumentation.span("storage.upload"):
+        async with aiofiles.open(destination, "r+b") as out_file:
+            await out_file.seek(offset)
+            await out_file.truncate(offset)
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    await out_file.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    written += len(chunk)
+            finally:
+                instrumentation.record_bytes("storage.upload", written)
+    return written
+
+
+def stored_size(path: str) -> int:
+    """Return the size in bytes of a stored file."""
+
+    return local_path(path).stat().st_size
+
+
+def delete_file(path: str) -> None:
+    """Remove a stored file if it exists."""
+
+    local_path(path).unlink(missing_ok=True)
+
+
+def move_file(src_path: str, dest_path: str) -> str:
+    """Move a stored file to ``dest_path`` (a rename within the storage directory)."""
+
+    destination = _resolve_destination(dest_path)
+    local_path(src_path).replace(destination)
+    return dest_path
+
+
+def stale_files(prefix: str, max_age_seconds: float) -> List[str]:
+    """Stored paths directly under ``prefix`` not modified for ``max_age_seconds``."""
+
+    base_path = Path(settings.storage_base_path)
+    folder = base_path / prefix
+    if not folder.is_dir():
+        return []
+    cutoff = time.time() - max_age_seconds
+    return [
+        str(entry.relative_to(base_path))
+        for entry in folder.iterdir()
+        if entry.is_file() and entry.stat().st_mtime < cutoff
+    ]
+
+
 def upload_bytes(data: bytes, dest_path: str, content_type: str | None = None) -> str:
     """Upload raw bytes to object storage."""
 
     destination = _resolve_destination(dest_path)
-    with open(destination, "wb") as out_file:
+    with instrumentation.span("storage.upload"), open(destination, "wb") as out_file:
         out_file.write(data)
+    instrumentation.record_bytes("storage.upload", len(data))
     return dest_path
 
 
@@ -41,8 +181,21 @@ def download_to_temp(path: str) -> str:
         raise FileNotFoundError(f"Storage path does not exist: {path}")
 
     suffix = source_path.suffix
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+    with instrumentation.span("storage.download"), tempfile.NamedTemporaryFile(
+        delete=False, suffix=suffix
+    ) as temp_file:
         with open(source_path, "rb") as in_file:
             shutil.copyfileobj(in_file, temp_file)
+        instrumentation.record_bytes("storage.download", temp_file.tell())
         temp_file_path = temp_file.name
     return temp_file_path
+
+
+def hash_file(local_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    """Return the hex SHA-256 digest of a local file's content."""
+
+    digest = hashlib.sha256()
+    with open(local_path, "rb") as in_file:
+        for chunk in iter(lambda: in_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,113 @@
+"""Compact binary encoding for timed lyrics and beat grids.
+
+Timed items (words or lines) are stored column-wise::
+
+    header   "<4sBI"  magic, format version, item count (n)
+    starts   n x float32 (little endian)
+    ends     n x float32 (little endian)
+    offsets  (n + 1) x uint32 byte offsets into the text blob
+    blob     UTF-8 text of all items, concatenated
+
+Beat grids are a header followed by the float32 values. Decoding is a couple
+of ``array.frombytes`` calls instead of parsing one JSON object per word, and
+times are rounded to milliseconds so float32 storage round-trips to the same
+JSON the API returned before.
+"""
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Sequence
+
+TIMED_MAGIC = b"BMTI"
+FLOATS_MAGIC = b"BMFL"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sBI")
+TIME_DECIMALS = 3
+
+
+def _to_le(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _read_header(data: bytes, magic: bytes) -> int:
+    found_magic, version, count = _HEADER.unpack_from(data)
+    if found_magic != magic or version != FORMAT_VERSION:
+        raise ValueError("Unrecognized packed timing data")
+    return count
+
+
+def is_packed(data: bytes) -> bool:
+    """Whether ``data`` is in this format rather than the JSON stored before it."""
+
+    return data[:4] in (TIMED_MAGIC, FLOATS_MAGIC)
+
+
+def encode_timed_items(items: Sequence[Dict[str, Any]], text_key: str) -> bytes:
+    """Pack ``[{"start", "end", text_key}, ...]`` into the columnar format."""
+
+    starts = array("f", (float(item["start"]) for item in items))
+    ends = array("f", (float(item["end"]) for item in items))
+    offsets = array("I", [0])
+    blob = bytearray()
+    for item in items:
+        blob.extend(str(item.get(text_key) or "").encode("utf-8"))
+        offsets.append(len(blob))
+    return b"".join(
+        [
+            _HEADER.pack(TIMED_MAGIC, FORMAT_VERSION, len(items)),
+            _to_le(starts),
+            _to_le(ends),
+            _to_le(offsets),
+            bytes(blob),
+        ]
+    )
+
+
+def decode_timed_items(data: bytes, text_key: str) -> List[Dict[str, Any]]:
+    """Inverse of :func:`encode_timed_items`."""
+
+    count = _read_header(data, TIMED_MAGIC)
+    position = _HEADER.size
+    float_bytes = count * 4
+    starts = _from_le("f", data[position:position + float_bytes])
+    position += float_bytes
+    ends = _from_le("f", data[position:position + float_bytes])
+    position += float_bytes
+    offsets = _from_le("I", data[position:position + (count + 1) * 4])
+    blob = data[position + (count + 1) * 4:]
+
+    return [
+        {
+            "start": round(starts[index], TIME_DECIMALS),
+            "end": round(ends[index], TIME_DECIMALS),
+            text_key: blob[offsets[index]:offsets[index + 1]].decode("utf-8"),
+        }
+        for index in range(count)
+    ]
+
+
+def encode_floats(values: Sequence[float]) -> bytes:
+    """Pack a list of times (e.g. a beat grid) as float32."""
+
+    return _HEADER.pack(FLOATS_MAGIC, FORMAT_VERSION, len(values)) + _to_le(array("f", values))
+
+
+def decode_floats(data: bytes) -> List[float]:
+    """Inverse of :func:`encode_floats`."""
+
+    count = _read_header(data, FLOATS_MAGIC)
+    values = _from_le("f", data[_HEADER.size:_HEADER.size + count * 4])
+    return [round(value, TIME_DECIMALS) for value in values]
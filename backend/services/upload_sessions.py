@@ -0,0 +1,136 @@
+"""State of resumable uploads.
+
+An upload session reserves a staging file under ``uploads/`` and records the
+final storage path; clients then send the file in chunks at increasing
+offsets and finalize it once every byte has arrived, which moves the file into
+place. Session state lives in Redis so any API process can accept the next
+chunk. Staging files whose session expired are removed by
+:func:`sweep_stale_uploads`. The SHA-256 of the content is computed incrementally by the process
+that receives the chunks; when consecutive chunks land on different processes
+the digest is recomputed from storage at finalize instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import Any, Dict, Optional
+
+from ..redis_client import get_async_redis
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL_SECONDS = 24 * 60 * 60
+CHUNK_LOCK_TTL_SECONDS = 10 * 60
+MAX_TRACKED_HASHERS = 1024
+STAGING_PREFIX = "uploads"
+SWEEP_INTERVAL_SECONDS = 60 * 60
+
+
+class RunningDigest:
+    """SHA-256 that remembers how many bytes it has consumed."""
+
+    def __init__(self) -> None:
+        self.position = 0
+        self._digest = hashlib.sha256()
+
+    def update(self, chunk: bytes) -> None:
+        self._digest.update(chunk)
+        self.position += len(chunk)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+# Running digests of the uploads this process has received chunks for.
+_hashers: "OrderedDict[str, RunningDigest]" = OrderedDict()
+
+
+def session_key(upload_id: str) -> str:
+    return f"upload:{upload_id}"
+
+
+def staging_path(upload_id: str, extension: str) -> str:
+    return f"{STAGING_PREFIX}/{upload_id}{extension}"
+
+
+def chunk_lock(upload_id: str) -> Any:
+    """Lock serializing chunk writes to one upload across API processes."""
+
+    return get_async_redis().lock(f"lock:upload:{upload_id}", timeout=CHUNK_LOCK_TTL_SECONDS)
+
+
+async def read_session(upload_id: str) -> Optional[Dict[str, Any]]:
+    raw = await get_async_redis().get(session_key(upload_id))
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+async def write_session(upload_id: str, **fields: Any) -> Dict[str, Any]:
+    """Merge ``fields`` into the stored session and return it."""
+
+    client = get_async_redis()
+    key = session_key(upload_id)
+    raw = await client.get(key)
+    session: Dict[str, Any] = json.loads(raw) if raw else {"upload_id": upload_id}
+    session.update(fields)
+    session["updated_at"] = datetime.utcnow().isoformat()
+    await client.set(key, json.dumps(session, default=str), ex=SESSION_TTL_SECONDS)
+    return session
+
+
+async def delete_session(upload_id: str) -> None:
+    await get_async_redis().delete(session_key(upload_id))
+    _hashers.pop(upload_id, None)
+
+
+async def sweep_stale_uploads() -> int:
+    """Delete staging files whose session has expired; returns how many.
+
+    Every chunk refreshes both the session and its file, so a staging file
+    untouched for the session TTL belongs to an expired session. At most one
+    API process sweeps per ``SWEEP_INTERVAL_SECONDS``.
+    """
+
+    client = get_async_redis()
+    if not await client.set("upload-sweep", "1", nx=True, ex=SWEEP_INTERVAL_SECONDS):
+        return 0
+    removed = 0
+    for path in await asyncio.to_thread(storage.stale_files, STAGING_PREFIX, SESSION_TTL_SECONDS):
+        if await client.exists(session_key(PurePosixPath(path).stem)):
+            continue
+        await asyncio.to_thread(storage.delete_file, path)
+        removed += 1
+    if removed:
+        logger.info("Removed %d abandoned upload staging files", removed)
+    return removed
+
+
+def hasher_at(upload_id: str, offset: int) -> Optional[RunningDigest]:
+    """Return this process's running digest if it covers exactly ``offset`` bytes."""
+
+    if offset == 0:
+        _hashers[upload_id] = RunningDigest()
+    digest = _hashers.get(upload_id)
+    if digest is None or digest.position != offset:
+        _hashers.pop(upload_id, None)
+        return None
+    _hashers.move_to_end(upload_id)
+    while len(_hashers) > MAX_TRACKED_HASHERS:
+        _hashers.popitem(last=False)
+    return digest
+
+
+def final_digest(upload_id: str, length: int) -> Optional[str]:
+    """Hex digest of a complete upload, if this process hashed all of it."""
+
+    digest = _hashers.pop(upload_id, None)
+    if digest is None or digest.position != length:
+        return None
+    return digest.hexdigest()
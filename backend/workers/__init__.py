@@ -1,5 +1,5 @@
 """Background workers and Celery tasks."""
 
-from .tasks import celery_app
+from .celery_app import celery_app
 
 __all__ = ["celery_app"]
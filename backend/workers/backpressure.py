@@ -0,0 +1,53 @@
+"""Release admission-control slots when admitted tasks finish.
+
+Tasks published with :meth:`backend.admission.Ticket.task_options` carry the
+project they were admitted for; once such a task finishes (successfully or
+not) or is revoked, its task id is dropped from the project's in-flight set.
+A task whose worker dies without either signal expires from the set on its
+own deadline.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+import redis
+from celery.signals import task_postrun, task_revoked
+
+from .. import admission
+
+logger = logging.getLogger(__name__)
+
+
+def _admitted_project(request: Any) -> Optional[str]:
+    project_id = getattr(request, admission.PROJECT_HEADER, None)
+    if project_id is None:
+        project_id = (getattr(request, "headers", None) or {}).get(admission.PROJECT_HEADER)
+    if project_id is None:
+        project_id = (getattr(request, "request_dict", None) or {}).get(admission.PROJECT_HEADER)
+    return project_id
+
+
+def _release(request: Any) -> None:
+    project_id = _admitted_project(request)
+    if project_id is None or request.id is None:
+        return
+    try:
+        admission.release(project_id, request.id)
+    except redis.RedisError as exc:
+        logger.warning("Failed to release admission slot for project %s: %s", project_id, exc)
+
+
+@task_postrun.connect
+def _release_admission_slot(task: Any = None, state: Optional[str] = None, **kwargs: Any) -> None:
+    # A retried task runs again and is released when that run finishes.
+    if state == "RETRY":
+        return
+    _release(task.request)
+
+
+@task_revoked.connect
+def _release_revoked_slot(request: Any = None, **kwargs: Any) -> None:
+    # Revoked, terminated and expired tasks never reach task_postrun.
+    if request is not None:
+        _release(request)
@@ -0,0 +1,271 @@
+"""Bulk BPM / beat-grid analysis for backfilling many audio tracks.
+
+Analyzing one track per Celery task pays librosa's import and numba JIT
+warm-up in every cold worker. Here a pool of processes is warmed up once and
+then fed track after track; results are written back in batched UPDATEs, and
+every committed batch is appended to a checkpoint file so an interrupted run
+resumes where it stopped.
+
+Tracks without a content hash are hashed first, and tracks sharing a content
+hash are analyzed once. Each analysis goes through the same idempotency
+record and fingerprint index as ``audio.analyze``: recorded results are
+reused, re-encoded copies of analyzed songs reuse that analysis, and content
+being analyzed by a live task is deferred to a later run.
+
+From the command line::
+
+    python -m backend.workers.bulk_analysis --all-unanalyzed --workers 8 --checkpoint backfill.jsonl
+    python -m backend.workers.bulk_analysis --ids-file track_ids.txt
+
+or as the ``audio.bulk_analyze`` task, which runs on the ``bulk`` queue (a
+solo-pool worker, since prefork children cannot start a process pool).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+
+from ..db import db_session
+from ..models import AudioTrack
+from ..services import audio_analysis, fingerprint, storage
+from . import dispatch, idempotency
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+# Tracks queued per pool process; bounds memory held by pending results.
+QUEUED_PER_WORKER = 2
+
+
+def _warm_up() -> None:
+    """Pool initializer: import librosa and trigger numba compilation once."""
+
+    librosa = audio_analysis._load_librosa()
+    if librosa is None:
+        return
+    import numpy as np
+
+    sample_rate = 22050
+    clicks = np.zeros(sample_rate * 4, dtype=np.float32)
+    clicks[:: sample_rate // 2] = 1.0
+    librosa.beat.beat_track(y=clicks, sr=sample_rate)
+
+
+def _hash_stored(storage_path: str) -> str:
+    return storage.hash_file(str(storage.stored_file(storage_path)))
+
+
+def _analyze_stored(track_id: str, storage_path: str, content_hash: str) -> Optional[Dict[str, object]]:
+    """Analyze one track in a pool process; ``None`` while a live task is analyzing the same content."""
+
+    def analyze() -> Dict[str, Any]:
+        local_path = storage.download_to_temp(storage_path)
+        try:
+            return fingerprint.analyze_or_reuse(track_id, local_path)
+        finally:
+            os.remove(local_path)
+
+    try:
+        return idempotency.run_once(dispatch.ANALYZE_AUDIO, content_hash, analyze)
+    except idempotency.InFlight:
+        return None
+
+
+def _read_checkpoint(path: Optional[Path]) -> Set[str]:
+    if path is None or not path.exists():
+        return set()
+    done: Set[str] = set()
+    with open(path) as checkpoint:
+        for line in checkpoint:
+            if line.strip():
+                done.update(json.loads(line)["ids"])
+    return done
+
+
+def _append_checkpoint(path: Optional[Path], track_ids: List[str]) -> None:
+    if path is None or not track_ids:
+        return
+    with open(path, "a") as checkpoint:
+        checkpoint.write(json.dumps({"ids": track_ids, "at": datetime.utcnow().isoformat()}) + "\n")
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+
+
+def unanalyzed_track_ids() -> List[str]:
+    """Ids of all audio tracks that have no BPM yet."""
+
+    with db_session() as session:
+        return list(session.scalars(select(AudioTrack.id).where(AudioTrack.bpm.is_(None)).order_by(AudioTrack.id)))
+
+
+def _group_by_content(track_ids: List[str], pool: ProcessPoolExecutor) -> Dict[str, Tuple[str, str, List[str]]]:
+    """Map a representative track id to its storage path, content hash and every id sharing its content.
+
+    Missing content hashes are computed in ``pool`` and stored. Tracks whose
+    file cannot be read are left out; analysing them would fail anyway.
+    """
+
+    with db_session() as session:
+        rows = session.execute(
+            select(AudioTrack.id, AudioTrack.storage_path, AudioTrack.content_hash).where(AudioTrack.id.in_(track_ids))
+        ).all()
+
+    unhashed = [(track_id, storage_path) for track_id, storage_path, content_hash in rows if content_hash is None]
+    hashed: Dict[str, str] = {}
+    futures = {pool.submit(_hash_stored, storage_path): track_id for track_id, storage_path in unhashed}
+    for future, track_id in futures.items():
+        try:
+            hashed[track_id] = future.result()
+        except OSError as exc:
+            logger.warning("Could not hash %s: %s", track_id, exc)
+    if hashed:
+        with db_session() as session:
+            session.execute(
+                update(AudioTrack), [{"id": track_id, "content_hash": digest} for track_id, digest in hashed.items()]
+            )
+            session.commit()
+
+    groups: Dict[str, Tuple[str, str, List[str]]] = {}
+    representative_by_hash: Dict[str, str] = {}
+    for track_id, storage_path, content_hash in rows:
+        content_hash = content_hash or hashed.get(track_id)
+        if content_hash is None:
+            continue
+        representative = representative_by_hash.setdefault(content_hash, track_id)
+        if representative == track_id:
+            groups[track_id] = (storage_path, content_hash, [track_id])
+        else:
+            groups[representative][2].append(track_id)
+    return groups
+
+
+def _write_batch(results: List[Tuple[List[str], Dict[str, object]]]) -> List[str]:
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": track_id,
+            "duration_seconds": result.get("duration_seconds"),
+            "bpm": result.get("bpm"),
+            "beat_grid": result.get("beat_grid"),
+            "updated_at": now,
+        }
+        for track_ids, result in results
+        for track_id in track_ids
+    ]
+    with db_session() as session:
+        session.execute(update(AudioTrack), rows)
+        session.commit()
+    return [row["id"] for row in rows]
+
+
+def analyze_tracks(
+    track_ids: Iterable[str],
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Analyze ``track_ids`` in a warm process pool and store BPM and beat grids.
+
+    Ids already recorded in ``checkpoint_path`` are skipped. Failures are
+    logged and reported but do not stop the run; content that a live task is
+    analyzing is reported as deferred and picked up by the next run. Returns
+    counts of analyzed, skipped, deferred and failed tracks.
+    """
+
+    checkpoint = Path(checkpoint_path) if checkpoint_path else None
+    done = _read_checkpoint(checkpoint)
+    pending_ids = [track_id for track_id in dict.fromkeys(track_ids) if track_id not in done]
+    workers = workers or os.cpu_count() or 1
+
+    analyzed = 0
+    deferred: List[str] = []
+    failed: Dict[str, str] = {}
+    batch: List[Tuple[List[str], Dict[str, object]]] = []
+
+    def flush() -> None:
+        nonlocal analyzed
+        if batch:
+            written = _write_batch(batch)
+            _append_checkpoint(checkpoint, written)
+            analyzed += len(written)
+            batch.clear()
+
+    in_flight: Dict[Future, str] = {}
+    # spawn: children must not inherit the parent's DB and Redis connections.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_warm_up) as pool:
+        groups = _group_by_content(pending_ids, pool) if pending_ids else {}
+        unreadable = set(pending_ids).difference(*(group[2] for group in groups.values()))
+        failed.update({track_id: "content could not be hashed" for track_id in unreadable})
+        queue = iter(groups.items())
+        while True:
+            while len(in_flight) < workers * QUEUED_PER_WORKER:
+                item = next(queue, None)
+                if item is None:
+                    break
+                representative, (storage_path, content_hash, _) = item
+                in_flight[pool.submit(_analyze_stored, representative, storage_path, content_hash)] = representative
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                representative = in_flight.pop(future)
+                track_group = groups[representative][2]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    logger.warning("Bulk analysis failed for %s: %s", representative, exc)
+                    failed.update({track_id: str(exc) for track_id in track_group})
+                    continue
+                if result is None:
+                    deferred.extend(track_group)
+                else:
+                    batch.append((track_group, result))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+    summary = {
+        "requested": len(pending_ids) + len(done),
+        "skipped": len(done),
+        "analyzed": analyzed,
+        "deferred": deferred,
+        "failed": failed,
+    }
+    logger.info("Bulk analysis finished: %s", {**summary, "deferred": len(deferred), "failed": len(failed)})
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill BPM and beat grids for many audio tracks.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ids-file", help="File with one AudioTrack id per line.")
+    source.add_argument("--all-unanalyzed", action="store_true", help="Analyze every track without a BPM.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--checkpoint", default=None, help="Resume file; completed ids are appended to it.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.all_unanalyzed:
+        track_ids = unanalyzed_track_ids()
+    else:
+        with open(args.ids_file) as ids_file:
+            track_ids = [line.strip() for line in ids_file if line.strip()]
+
+    summary = analyze_tracks(track_ids, args.workers, args.batch_size, args.checkpoint)
+    print(json.dumps({**summary, "failed": sorted(summary["failed"])}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
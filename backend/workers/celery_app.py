@@ -0,0 +1,20 @@
+"""Celery application shared by the API (to enqueue) and the workers.
+
+This module deliberately imports no task code: the API publishes tasks by
+name through :mod:`.dispatch`, and only worker processes load
+:mod:`.tasks` (via ``include``) together with the media libraries it uses.
+"""
+from __future__ import annotations
+
+from celery import Celery
+
+from ..config import settings
+from . import backpressure, metrics, profiles  # noqa: F401 - connect Celery signal handlers
+
+celery_app = Celery(
+    "beatmatchr",
+    broker=settings.celery_broker_url,
+    backend=settings.celery_result_backend,
+    include=[f"{__package__}.tasks"],
+)
+celery_app.conf.update(profiles.celery_config())
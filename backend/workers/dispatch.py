@@ -0,0 +1,40 @@
+"""Enqueue worker tasks by name without importing their implementations."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from celery.canvas import Signature
+from celery.result import AsyncResult
+
+from . import profiles
+from .celery_app import celery_app
+
+INGEST_URL = "media.ingest_url"
+INGEST_URL_BATCH = "media.ingest_url_batch"
+INGEST_BATCH_COMPLETE = "media.ingest_batch_complete"
+INGEST_BATCH_FAILED = "media.ingest_batch_failed"
+PROCESS_UPLOADED_VIDEO = "media.process_uploaded_video"
+ANALYZE_AUDIO = "audio.analyze"
+BULK_ANALYZE_AUDIO = "audio.bulk_analyze"
+TRANSCRIBE_LYRICS = "lyrics.transcribe"
+RENDER_VIDEO = "render.video"
+
+
+def enqueue(task_name: str, kwargs: Dict[str, Any], **options: Any) -> AsyncResult:
+    """Publish ``task_name`` with ``kwargs``; ``options`` are ``apply_async`` options."""
+
+    options.setdefault("priority", profiles.TASK_PRIORITIES.get(task_name, profiles.DEFAULT_PRIORITY))
+    return celery_app.send_task(task_name, kwargs=kwargs, **options)
+
+
+def signature(task_name: str, **kwargs: Any) -> Signature:
+    """Return a signature for use in groups and chords."""
+
+    priority = profiles.TASK_PRIORITIES.get(task_name, profiles.DEFAULT_PRIORITY)
+    return celery_app.signature(task_name, kwargs=kwargs, priority=priority)
+
+
+def revoke(task_id: str) -> None:
+    """Revoke a task and terminate it if a worker is already running it."""
+
+    celery_app.control.revoke(task_id, terminate=True)
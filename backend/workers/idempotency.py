@@ -0,0 +1,156 @@
+"""Idempotent task execution keyed by task name and input content hash.
+
+:func:`run_once` makes duplicate submissions of the same work collapse into a
+single execution. The first caller takes a Redis lock and computes the
+result; later duplicates get the recorded result straight away. A duplicate
+arriving while the work is still running gets :class:`InFlight` and is
+expected to re-queue itself (``self.retry``) rather than hold a worker slot
+while it waits. The lock is kept alive by a heartbeat for as long as the
+holder runs, so long analyses and transcriptions never run twice, while a
+holder that dies loses the lock within ``LOCK_TTL_SECONDS``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import redis
+
+from ..redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+RESULT_TTL_SECONDS = 7 * 24 * 60 * 60
+LOCK_TTL_SECONDS = 60
+RETRY_SECONDS = 15
+
+# Delete the lock only if it is still held by the caller's token.
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Extend the lock only if it is still held by the caller's token.
+_RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class InFlight(Exception):
+    """The same work is running elsewhere; retry after ``retry_after`` seconds."""
+
+    def __init__(self, task_name: str, content_hash: str, retry_after: int = RETRY_SECONDS) -> None:
+        super().__init__(f"{task_name} for {content_hash} is already running")
+        self.retry_after = retry_after
+
+
+class _Heartbeat(threading.Thread):
+    """Renew a held lock every third of its TTL until stopped."""
+
+    def __init__(self, lock_key: str, token: str, ttl: int) -> None:
+        super().__init__(name=f"heartbeat-{lock_key}", daemon=True)
+        self.lock_key = lock_key
+        self.token = token
+        self.ttl = ttl
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.ttl / 3):
+            try:
+                renewed = get_redis().eval(_RENEW_SCRIPT, 1, self.lock_key, self.token, self.ttl)
+            except redis.RedisError as exc:
+                logger.warning("Failed to renew %s: %s", self.lock_key, exc)
+                continue
+            if not renewed:
+                logger.warning("Lost %s while still running", self.lock_key)
+                return
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+def _result_key(task_name: str, content_hash: str) -> str:
+    return f"idem:{task_name}:{content_hash}:result"
+
+
+def _lock_key(task_name: str, content_hash: str) -> str:
+    return f"idem:{task_name}:{content_hash}:lock"
+
+
+def recorded_result(task_name: str, content_hash: str) -> Optional[Dict[str, Any]]:
+    """Return the recorded result of a completed execution, if any."""
+
+    raw = get_redis().get(_result_key(task_name, content_hash))
+    return json.loads(raw) if raw is not None else None
+
+
+def record_result(task_name: str, content_hash: str, result: Dict[str, Any]) -> None:
+    """Record ``result`` as if :func:`run_once` had computed it."""
+
+    get_redis().set(_result_key(task_name, content_hash), json.dumps(result), ex=RESULT_TTL_SECONDS)
+
+
+def in_flight(task_name: str, content_hash: str) -> bool:
+    """Whether a :func:`run_once` execution of this work currently holds the lock."""
+
+    return bool(get_redis().exists(_lock_key(task_name, content_hash)))
+
+
+def run_once(
+    task_name: str,
+    content_hash: str,
+    compute: Callable[[], Dict[str, Any]],
+    lock_ttl: int = LOCK_TTL_SECONDS,
+) -> Dict[str, Any]:
+    """Run ``compute`` at most once per ``(task_name, content_hash)``.
+
+    ``compute`` must return a JSON-serializable dict. If it raises, the lock is
+    released and nothing is recorded, so a retried duplicate takes over.
+    Raises :class:`InFlight` while another caller holds the lock.
+    """
+
+    client = get_redis()
+    lock_key = _lock_key(task_name, content_hash)
+    token = str(uuid.uuid4())
+
+    recorded = recorded_result(task_name, content_hash)
+    if recorded is not None:
+        logger.info("Reusing recorded %s result for %s", task_name, content_hash)
+        return recorded
+
+    if not client.set(lock_key, token, nx=True, ex=lock_ttl):
+        logger.info("%s for %s is in flight elsewhere", task_name, content_hash)
+        raise InFlight(task_name, content_hash)
+
+    heartbeat = _Heartbeat(lock_key, token, lock_ttl)
+    heartbeat.start()
+    try:
+        # A duplicate may have finished between the check and the lock.
+        recorded = recorded_result(task_name, content_hash)
+        if recorded is not None:
+            return recorded
+        result = compute()
+        record_result(task_name, content_hash, result)
+        return result
+    finally:
+        heartbeat.stop()
+        client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+
+
+def row_lock(name: str, timeout: int = 60) -> Any:
+    """Return a Redis lock that serializes writes to a shared row.
+
+    Used as a context manager around read-modify-write sequences that several
+    tasks may run concurrently.
+    """
+
+    return get_redis().lock(f"lock:{name}", timeout=timeout, blocking_timeout=timeout)
@@ -0,0 +1,255 @@
+"""Memory-aware placement and admission of heavy tasks.
+
+Publishers estimate a task's peak memory from stored media metadata
+(:func:`estimate_analysis`, :func:`estimate_render`) and attach it with
+:func:`placement`, which also routes jobs larger than ``LARGE_JOB_BYTES`` to
+the ``large`` queue, served by single-slot workers.
+
+On the worker, :func:`budgeted` reserves the estimate against the node's
+memory budget (shared by every worker process on the host through Redis)
+and checks the host's available memory against a low watermark. A task that
+does not fit is retried after a short delay so a node with room can take
+it; a task alone on its node always runs. Reservations are kept per task id
+with their own deadline, so the reservation of a task whose worker was
+killed before releasing it expires instead of shrinking the budget for good. While the task runs, a sampler
+thread tracks the resident memory of the process and its children; the
+peak is exported as a metric and fed back into a per-task calibration
+factor applied to future estimates.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import socket
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+import redis
+from celery import current_task
+
+from .. import instrumentation
+from ..config import settings
+from ..redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+ESTIMATE_HEADER = "memory_estimate"
+LARGE_QUEUE = "large"
+
+MIB = 1024 * 1024
+# librosa loads mono float32 at 22.05 kHz; STFT, onset envelope and
+# intermediate copies take several times the signal itself.
+ANALYSIS_BASE_BYTES = 400 * MIB
+ANALYSIS_BYTES_PER_SECOND = 22050 * 4 * 8
+# Without a known duration, assume a 128 kbit/s compressed file.
+ASSUMED_BYTES_PER_AUDIO_SECOND = 16_000
+# Each decoder keeps a few RGB frames buffered; the compositor holds a few
+# more at the output size.
+RENDER_BASE_BYTES = 500 * MIB
+RENDER_FRAMES_PER_DECODER = 6
+RENDER_OUTPUT_FRAMES = 8
+MAX_DECODERS_PER_SOURCE = 2
+
+RESERVATION_TTL_SECONDS = 6 * 60 * 60
+RETRY_SECONDS = 30
+SAMPLES_KEPT = 500
+CALIBRATION_WEIGHT = 0.2
+
+# KEYS[1] maps task id -> "bytes:deadline". Drop expired entries and any
+# earlier reservation of task ARGV[1], sum the live ones, then reserve ARGV[2]
+# bytes until now + ARGV[5] unless the node is busy and either the budget
+# ARGV[3] (0: none) would be exceeded or memory is low (ARGV[4] == 1).
+# Returns 1 when reserved.
+_RESERVE_SCRIPT = """
+local task_id = ARGV[1]
+local estimate = tonumber(ARGV[2])
+local budget = tonumber(ARGV[3])
+local low_memory = ARGV[4] == "1"
+local ttl = tonumber(ARGV[5])
+local now = tonumber(redis.call("TIME")[1])
+redis.call("HDEL", KEYS[1], task_id)
+local reserved = 0
+local entries = redis.call("HGETALL", KEYS[1])
+for index = 1, #entries, 2 do
+    local bytes, deadline = string.match(entries[index + 1], "^(%d+):(%d+)$")
+    if bytes == nil or tonumber(deadline) <= now then
+        redis.call("HDEL", KEYS[1], entries[index])
+    else
+        reserved = reserved + tonumber(bytes)
+    end
+end
+local alone = reserved == 0
+if not alone and ((budget > 0 and reserved + estimate > budget) or low_memory) then
+    return 0
+end
+redis.call("HSET", KEYS[1], task_id, estimate .. ":" .. (now + ttl))
+redis.call("EXPIRE", KEYS[1], ttl)
+return 1
+"""
+
+
+def estimate_analysis(duration_seconds: Optional[float], file_size: Optional[int] = None) -> int:
+    """Peak bytes for analyzing an audio track of the given duration or file size."""
+
+    if duration_seconds is None:
+        duration_seconds = (file_size or 0) / ASSUMED_BYTES_PER_AUDIO_SECOND
+    return int(ANALYSIS_BASE_BYTES + duration_seconds * ANALYSIS_BYTES_PER_SECOND)
+
+
+def estimate_render(resolution: str, sources: Iterable[Tuple[Optional[int], Optional[int], int]]) -> int:
+    """Peak bytes for a render.
+
+    ``sources`` yields ``(width, height, segment_count)`` for every distinct
+    source clip in the timeline; unknown dimensions count as the output size.
+    """
+
+    width, height = (int(value) for value in resolution.lower().split("x"))
+    total = RENDER_BASE_BYTES + width * height * 3 * RENDER_OUTPUT_FRAMES
+    for source_width, source_height, segments in sources:
+        frame_bytes = (source_width or width) * (source_height or height) * 3
+        total += frame_bytes * RENDER_FRAMES_PER_DECODER * min(segments, MAX_DECODERS_PER_SOURCE)
+    return int(total)
+
+
+def _calibration_key(task_name: str) -> str:
+    return f"memory:calibration:{task_name}"
+
+
+def calibrated(task_name: str, estimate: int) -> int:
+    """Scale a raw estimate by the observed peak/estimate ratio for ``task_name``."""
+
+    try:
+        factor = get_redis().get(_calibration_key(task_name))
+    except redis.RedisError:
+        factor = None
+    return int(estimate * float(factor)) if factor else estimate
+
+
+def placement(task_name: str, estimate: int, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """``apply_async`` options carrying ``estimate``, merged into ``options``.
+
+    Jobs estimated above ``LARGE_JOB_BYTES`` go to the ``large`` queue.
+    """
+
+    estimate = calibrated(task_name, estimate)
+    placed = dict(options or {})
+    placed["headers"] = {**placed.get("headers", {}), ESTIMATE_HEADER: estimate}
+    if estimate > settings.large_job_bytes:
+        placed["queue"] = LARGE_QUEUE
+    return placed
+
+
+def _meminfo() -> Dict[str, int]:
+    try:
+        with open("/proc/meminfo") as meminfo:
+            return {
+                name: int(value.split()[0]) * 1024
+                for name, value in (line.split(":", 1) for line in meminfo)
+            }
+    except (OSError, ValueError):
+        return {}
+
+
+def node_budget() -> int:
+    """Bytes this host's workers may reserve; 80% of RAM unless configured, 0 if unknown."""
+
+    if settings.worker_memory_budget_bytes:
+        return settings.worker_memory_budget_bytes
+    return int(_meminfo().get("MemTotal", 0) * 0.8)
+
+
+def _node_key() -> str:
+    return f"memory:node:{socket.gethostname()}"
+
+
+class _RssSampler(instrumentation.PeakRss):
+    def __init__(self, task_name: str, watermark: int) -> None:
+        super().__init__(name=f"rss-sampler-{task_name}")
+        self.task_name = task_name
+        self.watermark = watermark
+        self._warned = False
+
+    def sample(self, rss: int) -> None:
+        if self.watermark and rss > self.watermark and not self._warned:
+            logger.warning("%s is using %d bytes, above its %d byte watermark", self.task_name, rss, self.watermark)
+            instrumentation.MEMORY_WATERMARK_EXCEEDED.labels(self.task_name).inc()
+            self._warned = True
+
+
+def _record_peak(task_name: str, estimate: int, peak: int) -> None:
+    instrumentation.TASK_PEAK_RSS_BYTES.labels(task_name).observe(peak)
+    if not estimate or not peak:
+        return
+    try:
+        client = get_redis()
+        samples_key = f"memory:samples:{task_name}"
+        client.lpush(samples_key, json.dumps({"estimate": estimate, "peak": peak}))
+        client.ltrim(samples_key, 0, SAMPLES_KEPT - 1)
+        # Estimates carry the previous factor, so this converges on peak/raw.
+        previous = float(client.get(_calibration_key(task_name)) or 1.0)
+        ratio = previous * peak / estimate
+        client.set(_calibration_key(task_name), (1 - CALIBRATION_WEIGHT) * previous + CALIBRATION_WEIGHT * ratio)
+    except redis.RedisError as exc:
+        logger.warning("Failed to record peak memory for %s: %s", task_name, exc)
+
+
+def _reserve(task_id: str, estimate: int) -> bool:
+    """Reserve ``estimate`` bytes on this node for ``task_id``; ``False`` if it does not fit."""
+
+    available = _meminfo().get("MemAvailable")
+    low_memory = available is not None and available - estimate < settings.worker_memory_low_watermark_bytes
+    reserved = get_redis().eval(
+        _RESERVE_SCRIPT,
+        1,
+        _node_key(),
+        task_id,
+        estimate,
+        node_budget(),
+        int(low_memory),
+        RESERVATION_TTL_SECONDS,
+    )
+    return bool(reserved)
+
+
+def budgeted(fn: F) -> F:
+    """Run a Celery task within the node memory budget and record its peak RSS.
+
+    Apply below ``@celery_app.task``. The estimate comes from the message's
+    ``memory_estimate`` header; tasks published without one are not reserved.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        task = current_task
+        request = task.request
+        estimate = int(
+            getattr(request, ESTIMATE_HEADER, None) or (getattr(request, "headers", None) or {}).get(ESTIMATE_HEADER) or 0
+        )
+        reserved = False
+        if estimate:
+            try:
+                reserved = _reserve(request.id, estimate)
+            except redis.RedisError as exc:
+                logger.warning("Memory budget unavailable, running %s unreserved: %s", task.name, exc)
+                estimate = 0
+            else:
+                if not reserved:
+                    logger.info("Node memory budget exhausted; deferring %s (%d bytes)", task.name, estimate)
+                    raise task.retry(countdown=RETRY_SECONDS, max_retries=None)
+
+        sampler = _RssSampler(task.name, watermark=int(estimate * 1.5))
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            peak = sampler.stop()
+            if reserved:
+                try:
+                    get_redis().hdel(_node_key(), request.id)
+                except redis.RedisError as exc:
+                    logger.warning("Failed to release memory reservation for %s: %s", task.name, exc)
+            _record_peak(task.name, estimate, peak)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,70 @@
+"""Celery signal handlers feeding :mod:`backend.instrumentation`.
+
+Publishers stamp each message with its publish time so workers can report
+how long tasks waited in the queue; workers time every task and serve their
+metrics over HTTP on a per-profile port (:func:`.profiles.metrics_port`).
+
+Prefork workers record task metrics in their child processes, which the
+parent's registry only sees in ``prometheus_client`` multiprocess mode; a
+worker started without ``PROMETHEUS_MULTIPROC_DIR`` warns about it.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_init, worker_process_shutdown
+
+from .. import instrumentation
+from . import profiles
+
+logger = logging.getLogger(__name__)
+
+_started: Dict[str, float] = {}
+
+
+@before_task_publish.connect
+def _stamp_publish_time(headers: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def _record_queue_wait(task_id: str = "", task: Any = None, **kwargs: Any) -> None:
+    _started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        instrumentation.TASK_QUEUE_WAIT_SECONDS.labels(task.name).observe(max(time.time() - published_at, 0.0))
+
+
+@task_postrun.connect
+def _record_task_time(task_id: str = "", task: Any = None, state: Optional[str] = None, **kwargs: Any) -> None:
+    started = _started.pop(task_id, None)
+    if started is not None:
+        instrumentation.TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+
+
+def _is_prefork(worker: Any) -> bool:
+    pool = getattr(worker, "pool_cls", None)
+    name = pool if isinstance(pool, str) else getattr(pool, "__module__", "")
+    return "prefork" in (name or "")
+
+
+@worker_init.connect
+def _start_metrics_server(sender: Any = None, **kwargs: Any) -> None:
+    port = profiles.metrics_port(getattr(sender, "hostname", None) or "")
+    if not port:
+        return
+    if _is_prefork(sender) and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set: task metrics recorded in prefork children will be "
+            "missing from this worker's /metrics"
+        )
+    instrumentation.start_metrics_server(port)
+
+
+@worker_process_shutdown.connect
+def _mark_process_dead(pid: Optional[int] = None, **kwargs: Any) -> None:
+    instrumentation.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,155 @@
+"""Celery queues, task routing and per-workload worker profiles.
+
+Tasks are routed to a queue by the kind of work they do, and every queue is
+served by workers started with a matching profile:
+
+* ``cpu`` - audio analysis; prefork, one slot per core, no prefetching.
+* ``render`` - long video renders; prefork with few slots, so a render never
+  occupies a slot that analysis could use.
+* ``io`` - downloads and transcription API calls; a thread pool with many
+  slots since these tasks mostly wait on the network.
+* ``default`` - short bookkeeping tasks (thumbnails, chord callbacks).
+* ``large`` - analyses and renders estimated to need more memory than
+  ``LARGE_JOB_BYTES`` (see :mod:`.memory`); one slot, fresh process per task.
+* ``bulk`` - catalog backfills; a solo pool, because each task runs its own
+  process pool (see :mod:`.bulk_analysis`).
+
+Within a queue, small interactive jobs are published with a higher priority
+than bulk imports, so a thumbnail does not wait behind a playlist.
+
+Start a worker for a profile with::
+
+    python -m backend.workers.profiles cpu [--concurrency N]
+
+Each profile's workers serve metrics on their own port (see
+:func:`metrics_port`), so all profiles can run on one host.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from kombu import Queue
+
+from ..config import settings
+
+
+@dataclass(frozen=True)
+class WorkerProfile:
+    queue: str
+    pool: str
+    concurrency: int
+    prefetch_multiplier: int
+    acks_late: bool
+    max_tasks_per_child: Optional[int] = None
+
+
+_CPU_COUNT = os.cpu_count() or 1
+
+PROFILES: Dict[str, WorkerProfile] = {
+    "default": WorkerProfile(queue="default", pool="prefork", concurrency=2, prefetch_multiplier=4, acks_late=False),
+    "cpu": WorkerProfile(queue="cpu", pool="prefork", concurrency=_CPU_COUNT, prefetch_multiplier=1, acks_late=True),
+    "render": WorkerProfile(
+        queue="render",
+        pool="prefork",
+        concurrency=max(_CPU_COUNT // 4, 1),
+        prefetch_multiplier=1,
+        acks_late=True,
+        # Renders hold large frame buffers; recycle the process regularly.
+        max_tasks_per_child=10,
+    ),
+    "io": WorkerProfile(queue="io", pool="threads", concurrency=32, prefetch_multiplier=4, acks_late=True),
+    "large": WorkerProfile(
+        queue="large", pool="prefork", concurrency=1, prefetch_multiplier=1, acks_late=True, max_tasks_per_child=1
+    ),
+    "bulk": WorkerProfile(queue="bulk", pool="solo", concurrency=1, prefetch_multiplier=1, acks_late=True),
+}
+
+TASK_QUEUES: Dict[str, str] = {
+    "audio.analyze": "cpu",
+    "audio.bulk_analyze": "bulk",
+    "render.video": "render",
+    "media.ingest_url": "io",
+    "media.ingest_url_batch": "io",
+    "lyrics.transcribe": "io",
+    "media.process_uploaded_video": "default",
+    "media.ingest_batch_complete": "default",
+    "media.ingest_batch_failed": "default",
+}
+
+# Redis broker priorities: lower is served first; messages are bucketed into
+# ``priority_steps``, each stored under its own list key.
+BROKER_TRANSPORT_OPTIONS: Dict[str, object] = {"priority_steps": [0, 3, 6, 9], "sep": ":"}
+DEFAULT_PRIORITY = 3
+TASK_PRIORITIES: Dict[str, int] = {
+    "media.process_uploaded_video": 0,
+    "media.ingest_batch_complete": 0,
+    "media.ingest_batch_failed": 0,
+    "media.ingest_url_batch": 9,
+}
+
+
+def celery_config() -> Dict[str, object]:
+    """Celery settings for queues, routes and per-queue acknowledgement."""
+
+    return {
+        "task_queues": [Queue(name) for name in PROFILES],
+        "task_default_queue": "default",
+        "task_default_priority": DEFAULT_PRIORITY,
+        "broker_transport_options": BROKER_TRANSPORT_OPTIONS,
+        "task_routes": {name: {"queue": queue} for name, queue in TASK_QUEUES.items()},
+        "task_annotations": {
+            name: {"acks_late": PROFILES[queue].acks_late} for name, queue in TASK_QUEUES.items()
+        },
+        # Workers override this per profile on the command line.
+        "worker_prefetch_multiplier": 1,
+    }
+
+
+def metrics_port(hostname: str) -> int:
+    """Metrics port for a worker named ``<profile>@<host>`` (0 when disabled).
+
+    ``WORKER_METRICS_PORT`` plus the profile's position in :data:`PROFILES`;
+    workers not named after a profile use the base port.
+    """
+
+    if not settings.worker_metrics_port:
+        return 0
+    profile_name = hostname.partition("@")[0]
+    offset = list(PROFILES).index(profile_name) if profile_name in PROFILES else 0
+    return settings.worker_metrics_port + offset
+
+
+def worker_argv(profile_name: str, concurrency: Optional[int] = None) -> List[str]:
+    """Return ``celery worker`` arguments for a profile."""
+
+    profile = PROFILES[profile_name]
+    argv = [
+        "worker",
+        "--loglevel=info",
+        f"--queues={profile.queue}",
+        f"--pool={profile.pool}",
+        f"--concurrency={concurrency or profile.concurrency}",
+        f"--prefetch-multiplier={profile.prefetch_multiplier}",
+        f"--hostname={profile.queue}@%h",
+    ]
+    if profile.max_tasks_per_child:
+        argv.append(f"--max-tasks-per-child={profile.max_tasks_per_child}")
+    return argv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Start a Celery worker for a workload profile.")
+    parser.add_argument("profile", choices=sorted(PROFILES))
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    from .celery_app import celery_app
+
+    celery_app.worker_main(worker_argv(args.profile, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
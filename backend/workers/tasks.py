@@ -1,31 +1,94 @@
 from __future__ import annotations
 
+import logging
 import os
+import tempfile
 import uuid
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-from celery import Celery
-
+from ..cache import LYRICS, SOURCE_CLIPS, cache
 from ..config import settings
 from ..db import db_session
-from ..models import AudioTrack, Lyrics, SourceClip
-from ..services import audio_analysis, lyrics_from_audio, media_ingest, storage
-
-celery_app = Celery(
-    "beatmatchr",
-    broker=settings.celery_broker_url,
-    backend=settings.celery_result_backend,
+from ..events import AUDIO_ANALYZED, CLIP_INGESTED, INGEST_BATCH_COMPLETED, LYRICS_READY, publish_event
+from ..models import AudioTrack, AudioTranscription, Lyrics, SourceClip
+from ..services import (
+    fingerprint,
+    ingest_batches,
+    lyrics_from_audio,
+    media_ingest,
+    render_logger,
+    render_progress,
+    rendering,
+    storage,
 )
+from . import bulk_analysis, dispatch, idempotency, memory
+from .celery_app import celery_app
 
+logger = logging.getLogger(__name__)
 
-@celery_app.task(name="media.ingest_url")
+@celery_app.task(name=dispatch.INGEST_URL)
 def task_ingest_url(project_id: str, input_url: str, origin: str = "url") -> None:
     """Ingest media from a URL for the specified project."""
 
-    media_ingest.ingest_single_media_url(project_id=project_id, input_url=input_url, origin=origin)
+    clips = media_ingest.ingest_single_media_url(project_id=project_id, input_url=input_url, origin=origin)
+    cache.invalidate(SOURCE_CLIPS, project_id)
+    for clip in clips:
+        publish_event(project_id, CLIP_INGESTED, clip)
+
+
+@celery_app.task(name=dispatch.INGEST_URL_BATCH)
+def task_ingest_url_batch(project_id: str, input_urls: List[str], origin: str = "url") -> Dict[str, List[Dict]]:
+    """Ingest one chunk of a bulk URL import with a single bulk insert.
+
+    Errors are reported per URL rather than raised, so one bad chunk cannot
+    keep the chord callback from summarizing the batch.
+    """
+
+    try:
+        result = media_ingest.ingest_media_urls(project_id=project_id, input_urls=input_urls, origin=origin)
+    except Exception as exc:
+        logger.exception("Bulk ingest chunk failed for project %s", project_id)
+        return {"clips": [], "failed": [{"url": url, "error": str(exc)} for url in input_urls]}
+    if result["clips"]:
+        cache.invalidate(SOURCE_CLIPS, project_id)
+    for clip in result["clips"]:
+        publish_event(project_id, CLIP_INGESTED, clip)
+    return result
+
 
+@celery_app.task(name=dispatch.INGEST_BATCH_COMPLETE)
+def task_ingest_batch_complete(chunk_results: List[Dict[str, List[Dict]]], project_id: str, batch_id: str) -> Dict:
+    """Chord callback summarizing every chunk of a bulk URL import."""
 
-@celery_app.task(name="media.process_uploaded_video")
+    clip_ids = [clip["id"] for result in chunk_results for clip in result["clips"]]
+    failed = [failure for result in chunk_results for failure in result["failed"]]
+    status = ingest_batches.write_batch_status(
+        batch_id,
+        state="completed",
+        clips_created=len(clip_ids),
+        clip_ids=clip_ids,
+        failed=failed,
+    )
+    publish_event(
+        project_id,
+        INGEST_BATCH_COMPLETED,
+        {"batch_id": batch_id, "clips_created": len(clip_ids), "failed": len(failed)},
+    )
+    return status
+
+
+@celery_app.task(name=dispatch.INGEST_BATCH_FAILED)
+def task_ingest_batch_failed(callback_id: str, project_id: str, batch_id: str) -> Dict:
+    """Chord error callback: mark a bulk URL import whose chord could not complete as failed."""
+
+    error = celery_app.AsyncResult(callback_id).result
+    status = ingest_batches.write_batch_status(batch_id, state="failed", error=str(error) if error else None)
+    publish_event(project_id, INGEST_BATCH_COMPLETED, {"batch_id": batch_id, "state": "failed"})
+    return status
+
+
+@celery_app.task(name=dispatch.PROCESS_UPLOADED_VIDEO)
 def task_process_uploaded_video(source_clip_id: str) -> None:
     """Extract metadata and thumbnails for an uploaded video clip."""
 
@@ -47,20 +110,114 @@ def task_process_uploaded_video(source_clip_id: str) -> None:
             clip.updated_at = datetime.utcnow()
 
             session.commit()
+            cache.invalidate(SOURCE_CLIPS, clip.project_id)
+            publish_event(
+                clip.project_id,
+                CLIP_INGESTED,
+                {
+                    "id": clip.id,
+                    "thumbnail_path": clip.thumbnail_path,
+                    "duration_seconds": clip.duration_seconds,
+                    "width": clip.width,
+                    "height": clip.height,
+                    "fps": clip.fps,
+                },
+            )
         finally:
             if os.path.exists(local_video):
                 os.remove(local_video)
 
 
-@celery_app.task(name="audio.analyze")
-def task_analyze_audio(audio_track_id: str) -> None:
-    """Analyze audio track to compute BPM and beat grid."""
+class _LazyDownload:
+    """Download a storage object on first use and remove the copy on cleanup."""
+
+    def __init__(self, storage_path: str) -> None:
+        self.storage_path = storage_path
+        self._local_path: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        if self._local_path is None:
+            self._local_path = storage.download_to_temp(self.storage_path)
+        return self._local_path
+
+    def cleanup(self) -> None:
+        if self._local_path and os.path.exists(self._local_path):
+            os.remove(self._local_path)
+
+
+def _ensure_content_hash(audio: AudioTrack, local_audio: _LazyDownload) -> str:
+    if audio.content_hash is None:
+        audio.content_hash = storage.hash_file(local_audio.path)
+    return audio.content_hash
+
+
+def _stored_transcription(session: Any, *criteria: Any) -> Optional[Dict[str, Any]]:
+    row = (
+        session.query(AudioTranscription.raw_text, AudioTranscription.timed_words, AudioTranscription.timed_lines)
+        .join(AudioTrack, AudioTrack.id == AudioTranscription.audio_track_id)
+        .filter(*criteria)
+        .first()
+    )
+    if row is None:
+        return None
+    return {"raw_text": row.raw_text, "words": row.timed_words or [], "lines": row.timed_lines or []}
+
+
+def _reuse_transcription(content_hash: str) -> Optional[Dict[str, Any]]:
+    """Return a stored transcription of this audio or of a re-encoded copy of it.
+
+    Copies are found through the fingerprint stored by audio analysis; their
+    transcription is shifted onto this track's timeline.
+    """
+
+    with db_session() as session:
+        same = _stored_transcription(session, AudioTrack.content_hash == content_hash)
+    if same is not None:
+        return same
+
+    stored = fingerprint.stored_match(content_hash)
+    if stored is None:
+        return None
+    match, duration = stored
+    with db_session() as session:
+        matched = _stored_transcription(session, AudioTrack.id == match.audio_track_id)
+    if matched is None:
+        return None
+    logger.info("Reusing transcription of %s for %s", match.audio_track_id, content_hash)
+    return {
+        "raw_text": matched["raw_text"],
+        "words": fingerprint.shift_timed_items(matched["words"], match.offset_seconds, duration),
+        "lines": fingerprint.shift_timed_items(matched["lines"], match.offset_seconds, duration),
+    }
+
+
+@celery_app.task(name=dispatch.ANALYZE_AUDIO, bind=True)
+@memory.budgeted
+def task_analyze_audio(self, audio_track_id: str) -> None:
+    """Analyze audio track to compute BPM and beat grid.
+
+    Analysis results are recorded per audio content hash, so re-uploads and
+    duplicate submissions of the same file reuse a single analysis. A
+    re-encoded copy of an analyzed song is recognised by its acoustic
+    fingerprint and reuses that analysis, shifted by the copies' time offset.
+    While the same content is being analyzed elsewhere the task re-queues
+    itself.
+    """
 
     with db_session() as session:
         audio = session.query(AudioTrack).filter_by(id=audio_track_id).one()
-        local_path = storage.download_to_temp(audio.storage_path)
+        local_audio = _LazyDownload(audio.storage_path)
         try:
-            result = audio_analysis.analyze_audio(local_path)
+            content_hash = _ensure_content_hash(audio, local_audio)
+
+            def analyze() -> Dict[str, Any]:
+                return fingerprint.analyze_or_reuse(audio_track_id, local_audio.path)
+
+            try:
+                result = idempotency.run_once(dispatch.ANALYZE_AUDIO, content_hash, analyze)
+            except idempotency.InFlight as busy:
+                raise self.retry(countdown=busy.retry_after, max_retries=None)
 
             audio.duration_seconds = result.get("duration_seconds")
             audio.bpm = result.get("bpm")
@@ -68,47 +225,196 @@ def task_analyze_audio(audio_track_id: str) -> None:
             audio.updated_at = datetime.utcnow()
 
             session.commit()
+            publish_event(
+                audio.project_id,
+                AUDIO_ANALYZED,
+                {"audio_track_id": audio.id, "bpm": audio.bpm, "duration_seconds": audio.duration_seconds},
+            )
         finally:
-            if os.path.exists(local_path):
-                os.remove(local_path)
+            local_audio.cleanup()
+
+
+@celery_app.task(name=dispatch.BULK_ANALYZE_AUDIO, bind=True)
+def task_bulk_analyze_audio(
+    self,
+    track_ids: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    batch_size: int = bulk_analysis.DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Backfill BPM and beat grids for ``track_ids`` (default: every unanalyzed track).
 
+    The checkpoint is keyed by task id, so a redelivered task resumes the run.
+    """
 
-@celery_app.task(name="lyrics.transcribe")
-def task_transcribe_lyrics(project_id: str, audio_track_id: str) -> None:
-    """Transcribe lyrics from the project's audio track."""
+    checkpoint_dir = settings.storage_base_path / "checkpoints"
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    return bulk_analysis.analyze_tracks(
+        track_ids if track_ids is not None else bulk_analysis.unanalyzed_track_ids(),
+        workers=workers,
+        batch_size=batch_size,
+        checkpoint_path=str(checkpoint_dir / f"bulk-analysis-{self.request.id}.jsonl"),
+    )
+
+
+@celery_app.task(name=dispatch.TRANSCRIBE_LYRICS, bind=True)
+def task_transcribe_lyrics(self, project_id: str, audio_track_id: str) -> None:
+    """Transcribe lyrics from the project's audio track.
+
+    Transcriptions are recorded per audio content hash and stored per audio
+    track, and the Lyrics row is written under a per-project lock so
+    concurrent runs cannot interleave. A track whose audio, or a re-encoded
+    copy of it recognised by the fingerprint stored by analysis, was
+    transcribed before reuses that transcription instead of calling the API
+    again. While the same content is being transcribed, or is still being
+    fingerprinted by analysis, the task re-queues itself.
+    """
 
     with db_session() as session:
         audio = session.query(AudioTrack).filter_by(id=audio_track_id).one()
-        local_path = storage.download_to_temp(audio.storage_path)
+        local_audio = _LazyDownload(audio.storage_path)
         try:
-            result = lyrics_from_audio.transcribe_audio_to_lyrics(local_path)
+            content_hash = _ensure_content_hash(audio, local_audio)
+
+            def transcribe() -> Dict[str, Any]:
+                # Fingerprinting belongs to analysis; wait for a running one to store it.
+                if not fingerprint.is_fingerprinted(content_hash) and idempotency.in_flight(
+                    dispatch.ANALYZE_AUDIO, content_hash
+                ):
+                    raise idempotency.InFlight(dispatch.ANALYZE_AUDIO, content_hash)
+                reused = _reuse_transcription(content_hash)
+                if reused is not None:
+                    return reused
+                return lyrics_from_audio.transcribe_audio_to_lyrics(local_audio.path)
+
+            try:
+                result = idempotency.run_once(dispatch.TRANSCRIBE_LYRICS, content_hash, transcribe)
+            except idempotency.InFlight as busy:
+                raise self.retry(countdown=busy.retry_after, max_retries=None)
             raw_text = result["raw_text"]
             words = result.get("words", [])
             lines = result.get("lines", [])
 
-            existing = session.query(Lyrics).filter_by(project_id=project_id).one_or_none()
-            now = datetime.utcnow()
-
-            if existing is None:
-                lyrics = Lyrics(
-                    id=str(uuid.uuid4()),
-                    project_id=project_id,
-                    source="audio_transcription",
+            session.merge(
+                AudioTranscription(
+                    audio_track_id=audio_track_id,
                     raw_text=raw_text,
                     timed_words=words,
                     timed_lines=lines,
-                    created_at=now,
-                    updated_at=now,
                 )
-                session.add(lyrics)
-            else:
-                existing.source = "audio_transcription"
-                existing.raw_text = raw_text
-                existing.timed_words = words
-                existing.timed_lines = lines
-                existing.updated_at = now
+            )
+            with idempotency.row_lock(f"lyrics:{project_id}"):
+                existing = session.query(Lyrics).filter_by(project_id=project_id).one_or_none()
+                now = datetime.utcnow()
 
-            session.commit()
+                if existing is None:
+                    lyrics = Lyrics(
+                        id=str(uuid.uuid4()),
+                        project_id=project_id,
+                        source="audio_transcription",
+                        raw_text=raw_text,
+                        timed_words=words,
+                        timed_lines=lines,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    session.add(lyrics)
+                else:
+                    existing.source = "audio_transcription"
+                    existing.raw_text = raw_text
+                    existing.timed_words = words
+                    existing.timed_lines = lines
+                    existing.updated_at = now
+
+                session.commit()
+            cache.invalidate(LYRICS, project_id)
+            publish_event(project_id, LYRICS_READY, {"audio_track_id": audio_track_id, "line_count": len(lines)})
         finally:
-            if os.path.exists(local_path):
-                os.remove(local_path)
+            local_audio.cleanup()
+
+
+@celery_app.task(name=dispatch.RENDER_VIDEO)
+@memory.budgeted
+def task_render_video(
+    render_id: str,
+    project_id: str,
+    timeline: List[Dict],
+    resolution: str = "1080x1920",
+    fps: int = 30,
+) -> Dict[str, object]:
+    """Render a project timeline and publish progress for the render job.
+
+    Timeline segments reference source clips by ``source_clip_id``; they are
+    resolved to local files before handing the timeline to the renderer.
+    """
+
+    started = datetime.utcnow()
+    render_progress.write_progress(render_id, project_id=project_id, state="preparing", started_at=started.isoformat())
+    local_files: Dict[str, str] = {}
+    output_path = ""
+
+    try:
+        with db_session() as session:
+            audio = (
+                session.query(AudioTrack)
+                .filter_by(project_id=project_id)
+                .order_by(AudioTrack.created_at.desc())
+                .first()
+            )
+            if audio is None:
+                raise ValueError(f"Project {project_id} has no audio track")
+            lyrics = session.query(Lyrics).filter_by(project_id=project_id).one_or_none()
+            timed_lines = (lyrics.timed_lines or []) if lyrics is not None else []
+
+            clip_ids = {segment["source_clip_id"] for segment in timeline}
+            clips = session.query(SourceClip).filter(SourceClip.id.in_(clip_ids), SourceClip.project_id == project_id).all()
+            clip_paths = {clip.id: clip.storage_path for clip in clips}
+            missing = clip_ids - clip_paths.keys()
+            if missing:
+                raise ValueError(f"Unknown source clips: {sorted(missing)}")
+            audio_storage_path = audio.storage_path
+            # Stream-copied segments may start up to a sixteenth note away from
+            # the requested cut so they can begin on a keyframe.
+            keyframe_tolerance = 60.0 / audio.bpm / 4 if audio.bpm else 0.0
+
+        local_files["audio"] = storage.download_to_temp(audio_storage_path)
+        for clip_id, clip_storage_path in clip_paths.items():
+            local_files[clip_id] = storage.download_to_temp(clip_storage_path)
+
+        render_timeline = [{**segment, "clip_path": local_files[segment["source_clip_id"]]} for segment in timeline]
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_output:
+            output_path = temp_output.name
+
+        timings = rendering.StageTimings()
+        render_progress.write_progress(render_id, state="encoding", frames_encoded=0)
+        report = rendering.render_video(
+            audio_path=local_files["audio"],
+            timeline=render_timeline,
+            lyrics_timed_lines=timed_lines,
+            output_path=output_path,
+            resolution=resolution,
+            fps=fps,
+            timings=timings,
+            progress_logger=render_logger.RedisProgressLogger(render_id, timings),
+            keyframe_tolerance=keyframe_tolerance,
+        )
+
+        with open(output_path, "rb") as rendered:
+            storage_path = storage.upload_file(rendered, f"renders/{project_id}/{render_id}.mp4")
+    except Exception as exc:
+        render_progress.write_progress(render_id, state="failed", error=str(exc))
+        raise
+    finally:
+        for path in [*local_files.values(), output_path]:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    render_progress.write_progress(
+        render_id,
+        state="completed",
+        eta_seconds=0,
+        elapsed_seconds=round((datetime.utcnow() - started).total_seconds(), 1),
+        stage_seconds=report["stage_seconds"],
+        report=report,
+        output_path=storage_path,
+    )
+    return {"render_id": render_id, "storage_path": storage_path, **report}
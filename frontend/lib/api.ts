@@ -52,11 +52,24 @@ export async function uploadProjectAudio(projectId: string, file: File): Promise
   await handleResponse<void>(response);
 }
 
+const SOURCE_CLIP_PAGE_SIZE = 500;
+
 export async function getSourceClips(projectId: string): Promise<SourceClip[]> {
-  const response = await fetch(`${API_BASE_URL}/projects/${projectId}/source-clips`, {
-    cache: 'no-store'
-  });
-  return handleResponse<SourceClip[]>(response);
+  // The listing is keyset-paginated; follow X-Next-Cursor until the last page.
+  const clips: SourceClip[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: String(SOURCE_CLIP_PAGE_SIZE) });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await fetch(`${API_BASE_URL}/projects/${projectId}/source-clips?${params}`, {
+      cache: 'no-store'
+    });
+    clips.push(...(await handleResponse<SourceClip[]>(response)));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return clips;
 }
 
 export async function getLyrics(projectId: string): Promise<Lyrics> {